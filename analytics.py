@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from rollups import FIELDS, RESOLUTIONS, lttb, pick_resolution, rollup_store
+from segment_store import DATA_DIR, SegmentStore
+
+FREE_FLOW_SPEED = 60  # km/h on an empty junction
+JAM_DENSITY = 200     # vehicles queued across all approaches at which traffic stops
+MAX_POINTS = 2000     # most points any chart is sent
+
+WINDOWS = {
+    "Last hour": 3600,
+    "Last 24 hours": 86400,
+    "Last 7 days": 7 * 86400,
+    "Last 30 days": 30 * 86400,
+}
+
+
+def speed_from_density(density):
+    """Greenshields speed-density model; counts carry no speed, so speed is estimated."""
+    return FREE_FLOW_SPEED * np.clip(1 - np.asarray(density, dtype=np.float64) / JAM_DENSITY, 0, 1)
+
+
+class HistoryReader:
+    """Picks raw samples or a rollup for the window and returns an already downsampled frame."""
+
+    def __init__(self, root=DATA_DIR):
+        self.raw = SegmentStore(root)
+        self.rollups = {res: rollup_store(res, root) for res in RESOLUTIONS}
+
+    def frame(self, window_s, intersection, until_ms, max_points=MAX_POINTS):
+        """(DataFrame, resolution, samples read); resolution is None for raw samples.
+
+        The frame has Time, Traffic Density and Average Speed (km/h), plus Peak
+        Density (p95) when read from a rollup, and never more than max_points rows.
+        """
+        since_ms = until_ms - window_s * 1000
+        res = pick_resolution(window_s, max_points)
+        if res is None:
+            ts, counts = self.raw.read(since_ms, until_ms, intersection)
+            density = counts.sum(axis=1, dtype=np.float64)
+            peak = None
+        else:
+            ts, rows = self.rollups[res].read(since_ms, until_ms, intersection)
+            if rows.size == 0:
+                rows = np.zeros((0, len(FIELDS)), dtype=np.float32)
+            keep = rows[:, 0] > 0
+            ts, rows = ts[keep], rows[keep]
+            density = rows[:, 1] / rows[:, 0]  # mean over the bucket
+            peak = rows[:, 4]
+        read = int(ts.size)
+
+        idx = np.arange(ts.size)
+        if ts.size > max_points:
+            idx, _ = lttb(idx, density, max_points)
+        frame = pd.DataFrame({
+            "Time": pd.to_datetime(np.asarray(ts)[idx], unit="ms"),
+            "Traffic Density": density[idx],
+            "Average Speed (km/h)": speed_from_density(density[idx]),
+        })
+        if peak is not None:
+            frame["Peak Density (p95)"] = peak[idx]
+        return frame, res, read
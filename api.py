@@ -1,18 +1,676 @@
-from flask import Flask, jsonify
-import random, datetime
+from flask import Flask, Response, abort, g, jsonify, request, send_file, stream_with_context
+import atexit, datetime, gzip, json, logging, os, threading, time
+import numpy as np
+
+from collector import FeedCollector, load_feeds, read_status, report
+from forecast import HORIZONS_MIN, Forecaster
+from green_wave import PHASE_NAMES, corridors, network_from
+from history_store import RingHistory, SharedRingHistory
+from ingest import DetectorState, IngestQueue, drop_stale, parse_events, spool_batch
+from lottie_assets import ANIMATIONS, ensure_built
+from metrics import Metrics
+from rollups import Rollups
+from segment_store import SegmentStore
+from signal_optimizer import optimizer
+from trace_replay import SyntheticTraffic, TraceReplay
+import wire
 
 app = Flask(__name__)
+log = logging.getLogger(__name__)
+
+# --- CITY STATE (bulk endpoints) ---
+ROADS = ["North", "South", "East", "West"]
+# Per-approach count ranges (the original single-intersection /traffic ranges)
+COUNT_LOW = np.array([10, 5, 8, 6], dtype=np.uint16)
+COUNT_HIGH = np.array([40, 35, 45, 30], dtype=np.uint16)
+NUM_INTERSECTIONS = int(os.environ.get("TRAFFIC_INTERSECTIONS", "10000"))
+TICK_SECONDS = float(os.environ.get("TRAFFIC_TICK", "1.0"))
+DEFAULT_PAGE = 1000
+MAX_PAGE = 10000
+STREAM_KEEPALIVE = 15.0
+# Ticks kept in memory per intersection (10k intersections x 600 ticks ~ 48 MB)
+HISTORY_SAMPLES = int(os.environ.get("TRAFFIC_HISTORY_SAMPLES", "600"))
+MAX_HISTORY_CELLS = 2_000_000
+# On-disk history (what the Analytics page reads) is opt-in with TRAFFIC_PERSIST=1: at 10k
+# intersections and a 1 s tick the raw segments grow by ~80 KB a tick, ~7 GB a day
+PERSIST = os.environ.get("TRAFFIC_PERSIST", "0") != "0"
+# Set by serve.py: workers then read the ticks its ticker process writes to this folder
+SHARED_DIR = os.environ.get("TRAFFIC_SHARED")
+# Count source: unset for uniform random counts, a .npz/.csv trace file to replay, or "synthetic"
+# for seeded rush-hour traffic; TRAFFIC_REPLAY_SPEED runs its timeline 1-1000x faster than the clock
+REPLAY = os.environ.get("TRAFFIC_REPLAY")
+REPLAY_SPEED = float(os.environ.get("TRAFFIC_REPLAY_SPEED", "1"))
+REPLAY_LOOP = os.environ.get("TRAFFIC_REPLAY_LOOP", "1") != "0"
+# Upstream sensor feeds: a JSON feeds file (see collector.py) whose merged readings become the
+# counts, polled concurrently in the background; takes precedence over TRAFFIC_REPLAY
+FEEDS = os.environ.get("TRAFFIC_FEEDS")
+# Seeds the uniform and synthetic generators, so runs can be repeated exactly
+SEED = int(os.environ["TRAFFIC_SEED"]) if os.environ.get("TRAFFIC_SEED") else None
+# Where the synthetic timeline starts: epoch ms or a local ISO datetime (2025-01-06T07:00). Unset, a
+# seeded run starts at SEEDED_START so two runs serve the same counts; an unseeded one at the clock
+REPLAY_START = os.environ.get("TRAFFIC_REPLAY_START")
+SEEDED_START = "2025-01-06T00:00"  # a Monday midnight, ahead of the morning rush
+COMPRESS_MIN_BYTES = 1024
+# Request metrics for /metrics; TRAFFIC_METRICS=0 removes the hooks entirely (zero overhead)
+METRICS = os.environ.get("TRAFFIC_METRICS", "1") != "0"
+CACHE_ENTRIES = 256
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class CityState:
+    """Counts for every intersection, held as one (intersections x approaches) array.
+
+    The array is regenerated once per tick by run() (or by the first snapshot()
+    due, should run() fall behind) and replaced rather than mutated, so a
+    snapshot handed to a request never changes underneath it.
+    Counts are uniform random per approach, or read from `source` (a trace
+    replay or synthetic generator, see traffic_source()) when one is given;
+    cells that field detectors have reported recently (`detectors`) are laid over them.
+    With follow=True nothing is generated here: the newest tick is read from
+    a shared history that another process (serve.py's ticker) appends to.
+    The congestion forecaster is fed every tick, or, when following, catches
+    up from the shared history once a minute (from the first snapshot on, so
+    a process that only imports api.py, like serve.py's ticker, runs no
+    follower) and before each forecast.
+    """
+
+    def __init__(self, n, tick, history=None, persist=PERSIST, follow=False, forecast=True, source=None, seed=SEED,
+                 detectors=None):
+        self.n = n
+        self.tick = tick
+        self.ids = np.arange(n, dtype=np.int64)
+        self.source = source
+        self.detectors = detectors
+        self.rng = np.random.default_rng(seed)
+        self.counts = np.zeros((n, len(ROADS)), dtype=np.uint16)
+        self.updated = 0.0
+        self.history = history if history is not None else RingHistory(n, len(ROADS), HISTORY_SAMPLES)
+        self.follow = follow
+        self.store = SegmentStore() if persist and not follow else None
+        if self.store is not None:
+            self.store.compact_finished(int(time.time() * 1000))  # days a restart left as loose segments
+        self.rollups = Rollups(n) if persist and not follow else None
+        self.forecaster = Forecaster(n, len(ROADS)) if forecast else None
+        self.lock = threading.Lock()
+        self.follower = None  # started by the first snapshot, so importing api.py starts no thread
+
+    def snapshot(self):
+        if self.follow:
+            if self.forecaster is not None and self.follower is None:
+                self._start_follower()
+            ts_ms, counts = self.history.latest()
+            if counts is None:
+                return self.counts, self.updated  # ticker has not written its first tick yet
+            return counts, ts_ms / 1000
+        now = time.time()
+        with self.lock:
+            if now - self.updated >= self.tick:
+                if self.source is not None:
+                    self.counts = self.source.read(now)
+                else:
+                    self.counts = self.rng.integers(
+                        COUNT_LOW, COUNT_HIGH, size=(self.n, len(ROADS)), dtype=np.uint16, endpoint=True
+                    )
+                ts_ms = int(now * 1000)
+                if self.detectors is not None:
+                    self.counts = self.detectors.overlay(self.counts, ts_ms)
+                self.updated = ts_ms / 1000  # whole ms, so version() maps back to the history key
+                self.history.append(ts_ms, self.counts)
+                if self.store is not None:
+                    self.store.append(ts_ms, self.counts)
+                    self.rollups.add(ts_ms, self.counts)
+                if self.forecaster is not None:
+                    self.forecaster.add(ts_ms, self.counts)
+            return self.counts, self.updated
+
+    def forecasts(self, ids=None, horizons=HORIZONS_MIN):
+        """(horizons, ids, approaches) forecast counts, or None before the first full minute."""
+        if self.follow:
+            self.forecaster.catch_up(self.history)
+        return self.forecaster.forecasts(ids, horizons)
+
+    def _start_follower(self):
+        with self.lock:
+            if self.follower is None:
+                self.follower = threading.Thread(target=self._follow_forecasts, daemon=True, name="forecast-follower")
+                self.follower.start()
+
+    def _follow_forecasts(self):
+        # Keep up with the ring even when nobody asks, so no minute falls out of it unseen
+        while True:
+            self.forecaster.catch_up(self.history)
+            time.sleep(60)
+
+    def run(self, stop=None):
+        """Tick until the `stop` Event is set (forever without one); api.py's and serve.py's ticker."""
+        stop = stop or threading.Event()
+        failing = False
+        while not stop.is_set():
+            try:
+                _, updated = self.snapshot()
+            except Exception:
+                # A bad trace row or a source hiccup: keep ticking, logging once per run of failures
+                if not failing:
+                    log.exception("tick failed; retrying every tick until it succeeds")
+                failing = True
+                stop.wait(self.tick)
+                continue
+            if failing:
+                log.warning("ticking again")
+                failing = False
+            stop.wait(max(0.0, updated + self.tick - time.time()))
+
+
+def epoch_ms(value):
+    """Epoch milliseconds from a string of digits (already epoch ms) or a local ISO datetime."""
+    if value.strip().isdigit():
+        return int(value)
+    return int(datetime.datetime.fromisoformat(value).timestamp() * 1000)
+
+
+def traffic_source(folder=None):
+    """The configured count source (TRAFFIC_FEEDS or TRAFFIC_REPLAY), or None for uniform random counts.
+
+    A feed collector starts polling at once; with `folder` it also publishes
+    its feed status there, for serve.py's workers.
+    """
+    if FEEDS:
+        return FeedCollector(load_feeds(FEEDS), seed=SEED, folder=folder).start()
+    if not REPLAY:
+        return None
+    if REPLAY == "synthetic":
+        start = REPLAY_START or (SEEDED_START if SEED is not None else None)
+        return SyntheticTraffic(NUM_INTERSECTIONS, len(ROADS), seed=SEED or 0, speed=REPLAY_SPEED,
+                                start_ms=None if start is None else epoch_ms(start), step_s=TICK_SECONDS)
+    return TraceReplay(REPLAY, speed=REPLAY_SPEED, loop=REPLAY_LOOP)
+
+
+if SHARED_DIR:
+    history = SharedRingHistory(SHARED_DIR)
+    city = CityState(history.counts.shape[1], TICK_SECONDS, history=history, follow=True)
+else:
+    source = traffic_source()
+    n = NUM_INTERSECTIONS if source is None else source.n
+    city = CityState(n, TICK_SECONDS, source=source, detectors=DetectorState(n, len(ROADS)))
+    # Tick whether or not anyone asks, so history, rollups and forecasts have no idle gaps
+    threading.Thread(target=city.run, name="city-ticker", daemon=True).start()
+# Detector events: batched here, then merged into the city state (or, under serve.py,
+# spooled to the ticker that owns it) once per flush rather than once per event
+ingest_queue = IngestQueue(city.detectors.merge if city.detectors is not None
+                           else lambda *batch: spool_batch(SHARED_DIR, *batch))
+atexit.register(ingest_queue.flush)
+if city.store is not None:
+    atexit.register(city.store.flush, True)
+    atexit.register(city.rollups.flush, True)
+
+
+def format_ts(epoch):
+    return datetime.datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def version(updated):
+    """State version of a tick: its epoch milliseconds, which only ever grow and key the history."""
+    return int(round(updated * 1000))
+
+
+def parse_ids(raw, n):
+    """Parse ?ids=1,2,3 into a sorted array of valid intersection ids."""
+    wanted = np.array([i for i in raw.split(",") if i.strip()], dtype=np.int64)
+    wanted = wanted[(wanted >= 0) & (wanted < n)]
+    return np.unique(wanted)
+
+
+# --- ENCODING ---
+def _builtin(obj):
+    # NumPy values for the stdlib encoder (orjson only falls back here for non-contiguous arrays)
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def encode(payload):
+    """Compact JSON bytes; NumPy arrays are written directly, without tolist()."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_builtin, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":"), default=_builtin).encode("utf-8")
+
+
+class TickCache:
+    """Encoded response bodies for the current tick, keyed by request path and query.
+
+    The first request for a URL in a tick builds and encodes it; the rest of
+    the tick's requests for it copy the bytes (and a gzip copy, made once).
+    Everything is dropped when the tick changes.
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.tick = None
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, tick, key, build, encoder=encode):
+        """[body, gzipped body or None] for key, building (and encoding) the body on a miss."""
+        with self.lock:
+            if tick != self.tick:
+                self.tick, self.entries = tick, {}
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            entry = [encoder(build()), None]  # built outside the lock; a racing miss just encodes twice
+            with self.lock:
+                if tick == self.tick and len(self.entries) < self.max_entries:
+                    self.entries[key] = entry
+        return entry
+
+
+tick_cache = TickCache()
+
+
+def not_modified(ver):
+    """A bodiless 304 if the client's If-None-Match already names this version, else None."""
+    if not request.if_none_match.contains_weak(str(ver)):
+        return None
+    return Response(status=304, headers={"ETag": f'W/"{ver}"', "Vary": "Accept, Accept-Encoding", "Cache-Control": "no-cache"})
+
+
+def json_response(entry, status=200, ver=None, mimetype="application/json"):
+    """Response for a [body, gzipped] entry, compressed when it is worth it and the client accepts it.
+
+    With ver, the response carries a weak ETag for it (weak: the gzip and plain
+    bodies are the same representation) and must be revalidated before reuse.
+    """
+    body = entry[0]
+    headers = {"Vary": "Accept-Encoding"}
+    if ver is not None:
+        headers["ETag"] = f'W/"{ver}"'
+        headers["Cache-Control"] = "no-cache"
+    if len(body) >= COMPRESS_MIN_BYTES and "gzip" in request.headers.get("Accept-Encoding", ""):
+        if entry[1] is None:
+            entry[1] = gzip.compress(body, compresslevel=5)
+        body = entry[1]
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, status=status, mimetype=mimetype, headers=headers)
+
+
+def negotiated_response(updated, build, ver):
+    """Tick-cached response as JSON, or as wire.MIME columns when the Accept header prefers them."""
+    binary = request.accept_mimetypes.best_match(["application/json", wire.MIME]) == wire.MIME
+    entry = tick_cache.get(updated, (request.full_path, binary), build, wire.encode if binary else encode)
+    response = json_response(entry, ver=ver, mimetype=wire.MIME if binary else "application/json")
+    response.headers["Vary"] = "Accept, Accept-Encoding"
+    return response
+
+
+# --- METRICS ---
+metrics = Metrics(SHARED_DIR)
+
+if METRICS:
+    @app.before_request
+    def start_timer():
+        g.started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"  # bounded label set
+        size = None if response.is_streamed else response.content_length
+        metrics.observe(endpoint, request.method, response.status_code, time.perf_counter() - g.started, size)
+        return response
+
+    @app.route("/metrics")
+    def prometheus_metrics():
+        _, updated = city.snapshot()
+        gauges = {
+            "traffic_intersections": ("Intersections in the city state.", city.n),
+            "traffic_tick_timestamp_seconds": ("Epoch time of the newest tick.", f"{updated:.3f}"),
+            "traffic_tick_cache_hits": ("Responses served from the per-tick cache (this worker).", tick_cache.hits),
+            "traffic_tick_cache_misses": ("Responses encoded for the per-tick cache (this worker).", tick_cache.misses),
+            "traffic_optimizer_cache_entries": ("Memoized /optimize timings (this worker).", optimizer.stats()["entries"]),
+            "traffic_corridor_cache_entries": ("Cached /corridor green-wave plans (this worker).", corridors.stats()["entries"]),
+            "traffic_ingest_pending_events": ("Detector events buffered, not yet applied (this worker).", ingest_queue.pending),
+            "traffic_ingest_accepted_events": ("Detector events accepted (this worker).", ingest_queue.accepted),
+            "traffic_ingest_rejected_events": ("Detector events refused with 429 (this worker).", ingest_queue.rejected),
+            "traffic_ingest_ignored_events": ("Detector events already too old to show on arrival (this worker).",
+                                              ingest_queue.ignored),
+            "traffic_ingest_dropped_events": ("Detector events accepted but lost to a failed flush (this worker).",
+                                              ingest_queue.dropped),
+        }
+        table = feed_status()
+        if table is not None:
+            health = report(table, int(time.time() * 1000))
+            gauges["traffic_feeds"] = ("Upstream sensor feeds polled.", health["feeds"])
+            gauges["traffic_feeds_stale"] = ("Feeds without a good reading within their stale_after.", health["stale_feeds"])
+            gauges["traffic_feed_polls"] = ("Feed polls completed, successful or not.", health["polls"])
+            gauges["traffic_feed_errors"] = ("Failed feed requests, retries included.", int(table["errors"].sum()))
+        return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
+def feed_status():
+    """Status table of the upstream feeds (collector.STATUS_DTYPE), or None without TRAFFIC_FEEDS."""
+    if isinstance(city.source, FeedCollector):
+        return city.source.status()
+    if SHARED_DIR and FEEDS:
+        return read_status(SHARED_DIR)  # published by serve.py's ticker, which runs the collector
+    return None
+
 
 @app.route("/traffic")
 def traffic():
-    data = {
-        "North": {"vehicles": random.randint(10, 40)},
-        "South": {"vehicles": random.randint(5, 35)},
-        "East": {"vehicles": random.randint(8, 45)},
-        "West": {"vehicles": random.randint(6, 30)},
-        "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    """One intersection (?id=, default 0) in the original single-intersection format; changes once per tick."""
+    try:
+        i = int(request.args.get("id", 0))
+    except ValueError:
+        i = -1  # ?id=abc is as wrong as an id past the end, not a request for intersection 0
+    if not 0 <= i < city.n:
+        return jsonify({"error": f"id must be an integer in [0, {city.n})"}), 400
+    counts, updated = city.snapshot()
+    ver = version(updated)
+    cached = not_modified(ver)
+    if cached is not None:
+        return cached
+
+    def build():
+        data = {r: {"vehicles": int(c)} for r, c in zip(ROADS, counts[i])}
+        data["timestamp"] = format_ts(updated)
+        data["version"] = ver
+        return data
+
+    return json_response(tick_cache.get(updated, request.full_path, build), ver=ver)
+
+
+@app.route("/traffic/bulk")
+def traffic_bulk():
+    counts, updated = city.snapshot()
+    ids = city.ids
+    if request.args.get("ids"):
+        try:
+            ids = parse_ids(request.args["ids"], city.n)
+        except ValueError:
+            return jsonify({"error": "ids must be comma-separated integers"}), 400
+
+    offset = max(0, request.args.get("offset", 0, type=int))
+    limit = min(max(0, request.args.get("limit", DEFAULT_PAGE, type=int)), MAX_PAGE)
+    since = request.args.get("since_version", type=int)
+    ver = version(updated)
+    cached = not_modified(ver)
+    if cached is not None:
+        return cached
+
+    def build():
+        selected, full = ids, True
+        if since is not None:
+            # Diff mode: only the ids whose counts differ from version `since`; a version
+            # the history no longer holds (or never saw) gets the full state, full=true
+            base = counts if since == ver else city.history.at(since) if since < ver else None
+            if base is not None:
+                selected, full = ids[(counts[ids] != base[ids]).any(axis=1)], False
+        page = selected[offset:offset + limit]
+        # Columnar response: one row of counts per id, columns in ROADS order
+        payload = {
+            "timestamp": format_ts(updated),
+            "version": ver,
+            "roads": ROADS,
+            "total": int(selected.size),
+            "offset": offset,
+            "limit": limit,
+            "ids": page.astype(np.uint32),
+            "counts": counts[page],
+        }
+        if since is not None:
+            payload["since_version"] = since
+            payload["full"] = full
+        return payload
+
+    return negotiated_response(updated, build, ver)
+
+
+@app.route("/traffic/history")
+def traffic_history():
+    """Range read from the in-memory ring buffers; since/until are epoch seconds."""
+    try:
+        ids = parse_ids(request.args["ids"], city.n) if request.args.get("ids") else city.ids
+    except ValueError:
+        return jsonify({"error": "ids must be comma-separated integers"}), 400
+    since = request.args.get("since", type=float)
+    until = request.args.get("until", type=float)
+    step = max(1, request.args.get("step", 1, type=int))
+
+    _, updated = city.snapshot()
+
+    def build():
+        ts, counts = city.history.range(
+            None if since is None else int(since * 1000),
+            None if until is None else int(until * 1000),
+            ids if ids.size < city.n else None,
+            step,
+        )
+        if counts.size > MAX_HISTORY_CELLS:
+            raise ValueError(f"range too large ({counts.size} values), narrow ids/since/until or raise step")
+        return {
+            "roads": ROADS,
+            "ids": ids.astype(np.uint32),
+            "step": step,
+            "timestamps": ts,  # epoch milliseconds
+            "counts": counts,  # [time][id][road]
+        }
+
+    # History only changes when a tick lands, so a tick's responses can be reused
+    ver = version(updated)
+    cached = not_modified(ver)
+    if cached is not None:
+        return cached
+    try:
+        return negotiated_response(updated, build, ver)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+def sse(event, payload):
+    return f"event: {event}\ndata: {encode(payload).decode('utf-8')}\n\n"
+
+
+@app.route("/traffic/stream")
+def traffic_stream():
+    """Server-Sent Events: one full snapshot, then only the cells that changed."""
+    ids = city.ids
+    if request.args.get("ids"):
+        try:
+            ids = parse_ids(request.args["ids"], city.n)
+        except ValueError:
+            return jsonify({"error": "ids must be comma-separated integers"}), 400
+
+    def generate():
+        counts, updated = city.snapshot()
+        last = counts[ids]
+        yield sse("snapshot", {
+            "timestamp": format_ts(updated),
+            "epoch": updated,
+            "roads": ROADS,
+            "ids": ids.tolist(),
+            "counts": last.tolist(),
+        })
+        last_sent = time.time()
+        while True:
+            time.sleep(max(0.05, updated + city.tick - time.time()))
+            counts, new_updated = city.snapshot()
+            if new_updated == updated:
+                continue
+            updated = new_updated
+            current = counts[ids]
+            rows, cols = np.nonzero(current != last)
+            last = current
+            if rows.size:
+                yield sse("delta", {
+                    "timestamp": format_ts(updated),
+                    "epoch": updated,
+                    "ids": ids[rows].tolist(),
+                    "road_index": cols.tolist(),
+                    "counts": current[rows, cols].tolist(),
+                })
+                last_sent = time.time()
+            elif time.time() - last_sent >= STREAM_KEEPALIVE:
+                yield ": keepalive\n\n"
+                last_sent = time.time()
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+
+
+@app.route("/traffic/forecast")
+def traffic_forecast():
+    """Expected counts 5-60 minutes ahead: ?ids=&minutes=5,15,30,60 (whole minutes, at most 24 h)."""
+    try:
+        ids = parse_ids(request.args["ids"], city.n) if request.args.get("ids") else city.ids
+        minutes = [int(m) for m in request.args.get("minutes", ",".join(map(str, HORIZONS_MIN))).split(",") if m.strip()]
+    except ValueError:
+        return jsonify({"error": "ids and minutes must be comma-separated integers"}), 400
+    if not minutes or not all(1 <= m <= 1440 for m in minutes):
+        return jsonify({"error": "minutes must be between 1 and 1440"}), 400
+    _, updated = city.snapshot()
+
+    def build():
+        predicted = city.forecasts(ids if ids.size < city.n else None, minutes)
+        return {
+            "timestamp": format_ts(updated),
+            "roads": ROADS,
+            "ids": ids.astype(np.uint32),
+            "minutes": minutes,
+            "counts": None if predicted is None else np.round(predicted, 1),  # [horizon][id][road]
+        }
+
+    ver = version(updated)
+    cached = not_modified(ver)
+    if cached is not None:
+        return cached
+    return negotiated_response(updated, build, ver)
+
+
+@app.route("/traffic/feeds")
+def traffic_feeds():
+    """Health of the upstream feeds (TRAFFIC_FEEDS): age of each one's last good reading, staleness, errors."""
+    table = feed_status()
+    if table is None:
+        return jsonify({"error": "no upstream feeds configured (TRAFFIC_FEEDS)"}), 404
+    _, updated = city.snapshot()
+
+    def build():
+        payload = report(table, int(time.time() * 1000))  # ages as of now: feeds are polled between ticks
+        payload["timestamp"] = format_ts(updated)
+        return payload
+
+    return negotiated_response(updated, build, None)
+
+
+@app.route("/traffic/ingest", methods=["POST"])
+def traffic_ingest():
+    """Detector events (intersection, approach, timestamp, count) in batches; see ingest.parse_events.
+
+    202 once a batch is buffered: it shows up in the served counts within a
+    tick or two and holds there until its readings are ingest.DETECTOR_STALE_MS
+    old. Events already that old are left out and counted as "ignored".
+    429 with Retry-After when the buffer is full.
+    """
+    try:
+        batch = parse_events(request.get_data(), request.mimetype, city.n)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    batch, ignored = drop_stale(*batch)
+    if not ingest_queue.put(*batch, ignored=ignored):
+        response = jsonify({"error": "ingest buffer full, retry later", "pending": ingest_queue.pending})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(ingest_queue.retry_after())
+        return response
+    return jsonify({"accepted": int(batch[0].size), "ignored": ignored, "pending": ingest_queue.pending}), 202
+
+
+@app.route("/optimize", methods=["GET", "POST"])
+def optimize():
+    """Recommended signal time: GET for one query, POST {"queries": [...]} (or a bare list) for a batch."""
+    try:
+        if request.method == "GET":
+            query = {k: request.args.get(k) for k in ("road", "density", "weather", "time") if k in request.args}
+            return json_response([encode(optimizer.optimize([query])[0]), None])
+        body = request.get_json(silent=True)
+        queries = body.get("queries") if isinstance(body, dict) else body
+        if not isinstance(queries, list) or not all(isinstance(q, dict) for q in queries):
+            return jsonify({"error": 'POST a JSON list of queries or {"queries": [...]}'}), 400
+        return json_response([encode({"results": optimizer.optimize(queries)}), None])
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/corridor", methods=["GET", "POST"])
+def corridor():
+    """Green-wave timing for linked signals: GET ?ids=3,4,5&travel=30 for a corridor, POST for any network.
+
+    Cycles, splits and offsets follow the current counts; the plan is cached
+    per network until demand shifts (see green_wave.CorridorOptimizer).
+    """
+    try:
+        if request.method == "GET":
+            if not request.args.get("ids"):
+                return jsonify({"error": "ids is required: the corridor's intersections, west to east"}), 400
+            try:
+                spec = {"ids": [int(i) for i in request.args["ids"].split(",") if i.strip()],
+                        "travel": [float(t) for t in request.args.get("travel", "30").split(",")],
+                        "both_ways": request.args.get("both_ways", "1") != "0"}
+            except ValueError:
+                return jsonify({"error": "ids and travel must be comma-separated numbers"}), 400
+            if len(spec["travel"]) == 1:
+                spec["travel"] = spec["travel"][0]
+        else:
+            spec = request.get_json(silent=True)
+        net = network_from(spec, city.n)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    counts, updated = city.snapshot()
+    plan, cached = corridors.plan(net, counts[net.ids])
+    payload = {
+        "timestamp": format_ts(updated),
+        "ids": net.ids.astype(np.uint32),
+        "phases": PHASE_NAMES,
+        "cycle": plan.cycle,
+        "offset": plan.offset,  # start of the East-West green within the cycle, s
+        "green": plan.green,    # [signal][phase], s
+        "links": {
+            "from": net.ids[net.src].astype(np.uint32),
+            "to": net.ids[net.dst].astype(np.uint32),
+            "travel": net.travel,
+            "progression": plan.progression,  # s of the upstream green arriving on green
+        },
+        "paths": [{"from": int(net.ids[net.src[p[0]]]), "to": int(net.ids[net.dst[p[-1]]]), "signals": int(p.size) + 1,
+                   "band": float(b), "band_start": None if np.isnan(s) else float(s)}
+                  for p, b, s in zip(net.paths, plan.bands, plan.band_start)],
+        "efficiency": round(plan.efficiency, 4),
+        "cached": cached,
+        "compute_ms": round(plan.compute_ms, 1),
     }
-    return jsonify(data)
+    return json_response([encode(payload), None])
+
+
+@app.route("/assets/lottie/<name>")
+def lottie_asset(name):
+    """Optimized Lottie JSON, sent pre-compressed when the client accepts gzip."""
+    if name not in ANIMATIONS:
+        abort(404)
+    plain, packed = ensure_built(name)
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = send_file(packed, mimetype="application/json", max_age=86400)
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+    return send_file(plain, mimetype="application/json", max_age=86400)
+
 
 if __name__ == "__main__":
+    # Development server; see serve.py for the multi-worker production mode
     app.run(port=5000)
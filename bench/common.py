@@ -0,0 +1,91 @@
+"""Shared helpers for the benchmark scripts: percentiles, memory, and JSON results."""
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+REGRESSION = 0.10  # relative change flagged by compare()
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)  # benchmarks import the app modules from the repo root
+
+
+def latency_summary(seconds):
+    """p50/p95/p99/max in milliseconds for a list of per-request latencies."""
+    if not len(seconds):
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3), "max_ms": round(ms.max(), 3)}
+
+
+def rss_mb():
+    """Current resident set size of this process (Linux /proc), else the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save(name, results, path=None):
+    """Write {"env", "results"} to path (default bench/results/<name>.json); returns the path."""
+    path = path or os.path.join(RESULTS_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"env": environment(), "results": results}, f, indent=2)
+    return path
+
+
+def compare(previous_path, results, key, metrics):
+    """Print each metric next to a previous run; `metrics` maps name -> True if higher is better.
+
+    Returns the number of metrics that got worse by more than REGRESSION.
+    """
+    with open(previous_path, "r", encoding="utf-8") as f:
+        before = {r[key]: r for r in json.load(f)["results"]}
+    worse = 0
+    for r in results:
+        old = before.get(r[key])
+        if old is None:
+            continue
+        for metric, higher_is_better in metrics.items():
+            a, b = old.get(metric), r.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            regressed = change < -REGRESSION if higher_is_better else change > REGRESSION
+            worse += regressed
+            flag = "  REGRESSION" if regressed else ""
+            print(f"  {r[key]:28s} {metric:14s} {a:12.3f} -> {b:12.3f} ({change:+.1%}){flag}")
+    return worse
@@ -0,0 +1,93 @@
+"""Cold-import report and budget for the dashboard entry point and each page.
+
+Every target's top-level imports are run in a fresh interpreter with
+`-X importtime`. The entry point is charged its full cold start; a page is
+charged only what it imports on top of the entry (what opening it for the
+first time costs). The report lists the slowest packages and fails (exit 1)
+when a target goes over its budget. Run from anywhere:
+
+    python bench/imports.py [--json out.json] [--top 8]
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY = "hack6.py"
+MARKER = "--- page imports ---"
+
+# Import budget per target, milliseconds (entry: full cold start; pages: on top of the entry)
+BUDGET_MS = {
+    ENTRY: 900,
+    "views/home.py": 350,
+    "views/analytics.py": 900,
+    "views/predict.py": 300,
+    "views/about.py": 50,
+    "views/live.py": 400,
+    "views/city.py": 300,
+    "views/corridor.py": 300,
+    "views/impact.py": 400,
+}
+
+
+def import_statements(path):
+    """Module-level import statements of a script, as source text."""
+    with open(os.path.join(ROOT, path), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(n) for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom)))
+
+
+def measure(path):
+    code = import_statements(path)
+    if path != ENTRY:
+        # Load the entry first so only the page's own imports are charged to it
+        code = f"{import_statements(ENTRY)}\nimport sys\nsys.stderr.write({MARKER!r} + '\\n')\nsys.stderr.flush()\n{code}"
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{path}: imports failed\n{proc.stderr.splitlines()[-1]}")
+    lines = proc.stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    top = []  # (cumulative_us, package) for imports made directly by the target
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # nested imports are indented by two spaces per level
+            top.append((int(cumulative), name.strip()))
+    return {
+        "target": path,
+        "import_ms": sum(us for us, _ in top) / 1000,
+        "process_ms": wall_ms,
+        "budget_ms": BUDGET_MS[path],
+        "slowest": [{"module": n, "ms": us / 1000} for us, n in sorted(top, reverse=True)],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per target")
+    args = parser.parse_args()
+
+    results = [measure(path) for path in BUDGET_MS]
+    over = False
+    print(f"{'target':22s} {'imports':>9s} {'process':>9s} {'budget':>8s}")
+    for r in results:
+        flag = "" if r["import_ms"] <= r["budget_ms"] else "  OVER BUDGET"
+        over = over or bool(flag)
+        print(f"{r['target']:22s} {r['import_ms']:7.0f}ms {r['process_ms']:7.0f}ms {r['budget_ms']:6d}ms{flag}")
+        for s in r["slowest"][:args.top]:
+            print(f"    {s['ms']:8.1f}ms  {s['module']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if over else 0)
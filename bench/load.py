@@ -0,0 +1,206 @@
+"""Load test for api.py: throughput, latency percentiles and memory under concurrent clients.
+
+By default the app is imported and served in-process on a threaded local
+server (a real HTTP round trip, no external setup). --client drives Flask's
+test client instead (no sockets: measures the handlers alone), and --url
+targets an API that is already running, e.g. under a production server.
+Every scenario is run for --duration seconds by --concurrency workers, each
+looping over one endpoint. Stream requests are timed to the first snapshot
+event. On-disk persistence is off unless --persist is given.
+
+    python bench/load.py [--concurrency 8] [--duration 5] [--scenarios traffic,bulk]
+                         [--client | --url http://127.0.0.1:5000] [--compare bench/results/load.json]
+
+Client and server share the machine (and, in-process, the interpreter), so
+compare runs made the same way on the same host.
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+
+SCENARIOS = {
+    "traffic": "/traffic",
+    "bulk": "/traffic/bulk?limit=1000",
+    "bulk_ids": "/traffic/bulk?ids=" + ",".join(str(i) for i in range(0, 1000, 10)),
+    "history": "/traffic/history?ids=0,1,2,3",
+    "stream": "/traffic/stream?ids=0",
+    "bulk_poll": "/traffic/bulk?limit=1000",
+    "bulk_binary": "/traffic/bulk?limit=1000",
+}
+STREAMS = {"stream"}
+# Pollers that send back the last ETag, as the dashboards do: mostly 304s within a tick
+CONDITIONAL = {"bulk_poll"}
+# Extra request headers per scenario (bulk_binary negotiates the columnar wire format)
+HEADERS = {"bulk_binary": {"Accept": "application/vnd.traffic.columns"}}
+
+
+class HttpTarget:
+    """One pooled requests.Session per worker thread."""
+
+    def __init__(self, base_url):
+        import requests
+        self.requests = requests
+        self.base_url = base_url.rstrip("/")
+        self.local = threading.local()
+
+    def session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = self.requests.Session()
+        return self.local.session
+
+    def get(self, path, etags=None, headers=None):
+        headers = dict(headers or {}, **({"If-None-Match": etags[path]} if etags and path in etags else {}))
+        response = self.session().get(self.base_url + path, timeout=(3.05, 30), headers=headers)
+        response.raise_for_status()
+        if etags is not None and "ETag" in response.headers:
+            etags[path] = response.headers["ETag"]
+        return len(response.content)
+
+    def first_event(self, path):
+        with self.session().get(self.base_url + path, stream=True, timeout=(3.05, 30)) as response:
+            response.raise_for_status()
+            size = 0
+            for line in response.iter_lines():
+                size += len(line) + 1
+                if not line and size > 1:
+                    return size  # blank line ends the first event
+
+
+class ClientTarget:
+    """Flask test client per worker thread: the request handlers without any networking."""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def client(self):
+        if not hasattr(self.local, "client"):
+            self.local.client = self.app.test_client()
+        return self.local.client
+
+    def get(self, path, etags=None, headers=None):
+        headers = dict(headers or {}, **({"If-None-Match": etags[path]} if etags and path in etags else {}))
+        response = self.client().get(path, headers=headers)
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        if etags is not None and "ETag" in response.headers:
+            etags[path] = response.headers["ETag"]
+        return len(response.data)
+
+    def first_event(self, path):
+        response = self.client().get(path, buffered=False)
+        try:
+            return len(next(iter(response.response)))
+        finally:
+            response.close()
+
+
+def ms(value):
+    return f"{value:7.1f}ms" if value is not None else "      n/a"
+
+
+def start_server(app):
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no access log line per request
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_scenario(target, name, concurrency, duration):
+    path = SCENARIOS[name]
+    fetch = target.first_event if name in STREAMS else target.get
+    fetch(path)  # warm-up: connections, first tick, lazy imports
+
+    def worker(deadline):
+        latencies, sizes, errors = [], 0, 0
+        etags = {} if name in CONDITIONAL else None  # one ETag memory per worker
+        call = fetch if name in STREAMS else (lambda p: fetch(p, etags, HEADERS.get(name)))
+        while True:
+            start = time.perf_counter()
+            if start >= deadline:
+                return latencies, sizes, errors
+            try:
+                sizes += call(path) or 0
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    deadline = start + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        parts = list(pool.map(worker, [deadline] * concurrency))
+    elapsed = time.perf_counter() - start
+
+    latencies = [s for part in parts for s in part[0]]
+    ok = len(latencies)
+    return {
+        "scenario": name,
+        "path": path,
+        "concurrency": concurrency,
+        "requests": ok,
+        "errors": sum(part[2] for part in parts),
+        "throughput_rps": round(ok / elapsed, 2),
+        **common.latency_summary(latencies),
+        "avg_bytes": round(sum(part[1] for part in parts) / ok) if ok else None,
+        "rss_mb": common.rss_mb(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent workers per scenario")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--intersections", type=int, default=10000, help="city size for the in-process app")
+    target_group = parser.add_mutually_exclusive_group()
+    target_group.add_argument("--client", action="store_true", help="use Flask's test client instead of HTTP")
+    target_group.add_argument("--url", help="benchmark an already running API at this base URL")
+    parser.add_argument("--persist", action="store_true", help="write on-disk history/rollups in-process (TRAFFIC_PERSIST=1)")
+    parser.add_argument("--json", help="results file (default bench/results/load.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    server = None
+    if args.url:
+        target = HttpTarget(args.url)
+    else:
+        os.environ["TRAFFIC_INTERSECTIONS"] = str(args.intersections)
+        os.environ["TRAFFIC_PERSIST"] = "1" if args.persist else "0"
+        from api import app
+        if args.client:
+            target = ClientTarget(app)
+        else:
+            server = start_server(app)
+            target = HttpTarget(f"http://127.0.0.1:{server.server_port}")
+    mode = "url" if args.url else "client" if args.client else "http"
+
+    results = []
+    print(f"{'scenario':10s} {'req/s':>9s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'errors':>7s} {'bytes':>9s} {'rss':>8s}")
+    for name in names:
+        r = run_scenario(target, name, args.concurrency, args.duration)
+        r["mode"] = mode
+        results.append(r)
+        print(f"{name:10s} {r['throughput_rps']:9.1f} {ms(r['p50_ms'])} {ms(r['p95_ms'])} {ms(r['p99_ms'])} "
+              f"{r['errors']:7d} {r['avg_bytes'] or 0:9d} {r['rss_mb'] or 0:6.0f}MB")
+    if server is not None:
+        server.shutdown()
+    peak = common.peak_rss_mb()
+    if peak is not None and not args.url:
+        print(f"peak RSS (client + in-process server): {peak:.0f} MB")
+
+    print("results:", common.save("load", results, args.json))
+    if args.compare:
+        worse = common.compare(args.compare, results, "scenario", {"throughput_rps": True, "p95_ms": False, "p99_ms": False})
+        sys.exit(1 if worse else 0)
@@ -0,0 +1,241 @@
+"""Micro-benchmarks for the per-request hot paths: green times, serialization and instrumentation.
+
+Each case is timed with timeit: the loop count is calibrated to about 0.2 s,
+the loop is repeated --repeat times, and the best and median time per call
+are reported (best is the number to compare; the median shows the noise).
+
+    python bench/micro.py [--filter json] [--repeat 5] [--compare bench/results/micro.json]
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import timeit
+
+import numpy as np
+
+import common
+import wire
+from signal_engine import ROADS, green_times, plan_for
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+os.environ.setdefault("TRAFFIC_PERSIST", "0")  # importing api must not start writing history to disk
+
+
+def cases():
+    """(name, setup) pairs. setup() prepares the case's inputs (seeded, so runs see the same data)
+    and returns the callable to time; nothing is built for cases --filter skips."""
+    out = []
+    for n in (1, 1000, 10000):
+        out.append((f"green_times/{n}", functools.partial(green_times_case, n)))
+        out.append((f"green_times_cycle/{n}", functools.partial(
+            green_times_case, n, min_green=7, max_green=60, cycle_length=90, lost_time=12)))
+    out.append(("plan_for/dict", plan_for_case))
+    for n in (1000, 10000):
+        out.append((f"bulk_tolist/{n}", functools.partial(tolist_case, n)))
+        out.append((f"json.dumps/{n}", functools.partial(dumps_case, n)))
+        out.append((f"jsonify/{n}", functools.partial(jsonify_case, n)))
+        if orjson is not None:
+            out.append((f"orjson.dumps/{n}", functools.partial(orjson_case, n, False)))
+            out.append((f"orjson.numpy/{n}", functools.partial(orjson_case, n, True)))
+    out.append(("forecast_add/10000", functools.partial(forecast_add_case, 1000)))  # one tick per second
+    out.append(("forecast_step/10000", functools.partial(forecast_add_case, 60_000)))  # every add closes a minute
+    out.append(("forecast_60min/10000", forecast_case))
+    out.append(("optimize/cached", optimize_cached_case))
+    out.append(("optimize/batch_cold/10000", optimize_cold_case))
+    out.append(("green_wave/corridor_cold/200", functools.partial(green_wave_case, "corridor")))
+    out.append(("green_wave/grid_cold/200", functools.partial(green_wave_case, "grid")))
+    out.append(("green_wave/cached/200", functools.partial(green_wave_case, "cached")))
+    out.append(("wire.encode/10000", wire_encode_case))
+    out.append(("json.loads/10000", json_loads_case))
+    out.append(("wire.decode/10000", wire_decode_case))
+    out.append(("sse_delta/10000", sse_case))
+    out.append(("span/off", functools.partial(span_case, False)))
+    out.append(("span/on", functools.partial(span_case, True)))
+    out.append(("metrics_observe", metrics_case))
+    return out
+
+
+def _api():
+    import api  # only for the cases that need it: importing it builds a whole city state
+    return api
+
+
+def _counts(n):
+    return np.random.default_rng(n).integers(5, 46, size=(n, len(ROADS)), dtype=np.uint16)
+
+
+@functools.lru_cache(maxsize=None)
+def _payload(n):
+    return {"timestamp": "2025-01-01 00:00:00", "roads": ROADS, "total": n, "offset": 0, "limit": n,
+            "ids": list(range(n)), "counts": _counts(n).tolist()}
+
+
+def green_times_case(n, **kwargs):
+    counts = _counts(n).astype(np.int64)
+    return lambda: green_times(counts, **kwargs)
+
+
+def plan_for_case():
+    single = {r: int(v) for r, v in zip(ROADS, _counts(1)[0])}
+    return lambda: plan_for(single)
+
+
+def tolist_case(n):
+    ids, counts = np.arange(n), _counts(n)
+    return lambda: (ids.tolist(), counts.tolist())
+
+
+def dumps_case(n):
+    payload = _payload(n)
+    return lambda: json.dumps(payload, separators=(",", ":"))
+
+
+def jsonify_case(n):
+    from flask import jsonify
+    app, payload = _api().app, _payload(n)
+    return lambda: _jsonify(app, jsonify, payload)
+
+
+def orjson_case(n, numpy):
+    if numpy:
+        counts = _counts(n)
+        return lambda: orjson.dumps(counts, option=orjson.OPT_SERIALIZE_NUMPY)
+    payload = _payload(n)
+    return lambda: orjson.dumps(payload)
+
+
+def forecast_add_case(spacing_ms):
+    from forecast import Forecaster
+    model, tick = Forecaster(10000, len(ROADS)), _counts(10000)
+    clock = iter(range(0, 10**15, spacing_ms))
+    return lambda: model.add(next(clock), tick)
+
+
+def forecast_case():
+    from forecast import Forecaster
+    model, tick = Forecaster(10000, len(ROADS)), _counts(10000)
+    for minute in range(3):  # two closed minute steps, so there is a model to forecast from
+        model.add(minute * 60_000, tick)
+    return lambda: model.forecast(60)
+
+
+def optimize_cached_case():
+    from signal_optimizer import SignalOptimizer
+    what_if = [{"road": "MG Road", "density": 55, "weather": "Rainy", "time": "08:10"}]
+    warm = SignalOptimizer()
+    warm.optimize(what_if)
+    return lambda: warm.optimize(what_if)
+
+
+def optimize_cold_case():
+    from signal_optimizer import SignalOptimizer, WEATHER_FLOW
+    rng = np.random.default_rng(0)
+    planning = [{"density": float(d), "weather": w, "time": f"{h}:{m:02d}"} for d, w, h, m in zip(
+        rng.uniform(0, 100, 10000), rng.choice(list(WEATHER_FLOW), 10000), rng.integers(0, 24, 10000), rng.integers(0, 60, 10000))]
+    return lambda: SignalOptimizer().optimize(planning)
+
+
+def green_wave_case(kind):
+    from green_wave import CorridorOptimizer, chain, grid
+    rng = np.random.default_rng(0)
+    net = chain(np.arange(200), rng.uniform(15, 45, 199))
+    if kind == "grid":
+        net = grid(np.arange(200).reshape(10, 20), 30, 22)
+    demand = rng.integers(5, 46, size=(200, len(ROADS)))
+    if kind != "cached":
+        return lambda: CorridorOptimizer().plan(net, demand)
+    planned = CorridorOptimizer()
+    planned.plan(net, demand)
+    return lambda: planned.plan(net, demand)
+
+
+def _columns():
+    return {"timestamp": "2025-01-01 00:00:00", "roads": ROADS, "ids": np.arange(10000, dtype=np.uint32),
+            "counts": _counts(10000)}
+
+
+def wire_encode_case():
+    full = _columns()
+    return lambda: wire.encode(full)
+
+
+def json_loads_case():
+    as_json = _api().encode(_columns())
+    return lambda: np.asarray(json.loads(as_json)["counts"])
+
+
+def wire_decode_case():
+    as_columns = wire.encode(_columns())
+    return lambda: wire.decode(as_columns)
+
+
+def sse_case():
+    rng = np.random.default_rng(0)
+    rows, cols = np.nonzero(rng.random((10000, len(ROADS))) < 0.5)
+    delta = {"timestamp": "2025-01-01 00:00:00", "epoch": 0.0, "ids": rows.tolist(), "road_index": cols.tolist(),
+             "counts": rng.integers(5, 46, size=rows.size).tolist()}
+    sse = _api().sse
+    return lambda: sse("delta", delta)
+
+
+def span_case(enabled):
+    from timing import Timings
+    timings = Timings(enabled)
+    return lambda: _span(timings)
+
+
+def metrics_case():
+    metrics = _api().metrics
+    return lambda: metrics.observe("/traffic", "GET", 200, 0.0004, 129)
+
+
+def _jsonify(app, jsonify, payload):
+    # What a Flask view pays: the JSON provider plus building the response body
+    with app.app_context():
+        return jsonify(payload).get_data()
+
+
+def _span(timings):
+    with timings.span("compute"):
+        pass
+
+
+def measure(name, fn, repeat):
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    times = [t / loops for t in timer.repeat(repeat=repeat, number=loops)]
+    return {
+        "case": name,
+        "loops": loops,
+        "best_us": round(min(times) * 1e6, 3),
+        "median_us": round(float(np.median(times)) * 1e6, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="results file (default bench/results/micro.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'case':28s} {'best':>12s} {'median':>12s} {'loops':>8s}")
+    for name, setup in cases():
+        if args.filter not in name:
+            continue
+        r = measure(name, setup(), args.repeat)
+        results.append(r)
+        print(f"{name:28s} {r['best_us']:10.1f}us {r['median_us']:10.1f}us {r['loops']:8d}")
+
+    print("results:", common.save("micro", results, args.json))
+    if args.compare:
+        worse = common.compare(args.compare, results, "case", {"best_us": False})
+        sys.exit(1 if worse else 0)
@@ -0,0 +1,374 @@
+"""Fan-in collector: polls many upstream intersection feeds and merges them into one count matrix.
+
+Each feed is an HTTP URL serving one intersection in the original /traffic
+format ({"North": {"vehicles": 12}, ...}, as api.py and the mocki.io mock
+do). Every feed runs as its own asyncio task on one event loop thread, with
+its own interval (jittered, so hundreds of feeds do not fire in lockstep),
+timeout and retries; a slow or dead feed only ever holds up itself. Readings
+land in an (intersections x approaches) array that api.py serves like any
+other count source (TRAFFIC_FEEDS). A feed whose last good reading is older
+than its stale_after keeps its last counts and is reported as stale.
+
+The feeds file is JSON: a list of feeds, or {"defaults": {...}, "feeds": [...]}.
+
+    [{"url": "http://10.0.0.7/traffic", "intersection": 0, "interval": 2, "timeout": 1.5},
+     {"url": "http://127.0.0.1:5000/traffic?id={id}", "intersections": [1, 500]}]
+
+The second entry expands to one feed per id in [1, 500). Try a feeds file with:
+
+    python collector.py feeds.json [--seconds 10]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import random
+import ssl
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from signal_engine import ROADS
+
+CONCURRENCY = 256          # requests in flight at once, across all feeds (bounds open sockets too)
+MAX_BODY = 1 << 20         # bytes; a feed sending more is treated as broken
+RETRY_BACKOFF = 0.2        # s before the first retry, doubled for each further one
+STALE_INTERVALS = 3        # default staleness: no good reading for this many intervals
+STATUS_FILE = "feeds.npy"  # per-feed status published to a shared folder (serve.py's ticker)
+STATUS_EVERY = 1.0         # s between status files
+STATUS_DTYPE = np.dtype([
+    ("id", "<u4"),              # intersection the feed reports
+    ("ok_ms", "<i8"),           # epoch ms of the last good reading, -1 before the first
+    ("stale_after_ms", "<i8"),
+    ("latency_ms", "<f4"),      # of the last good reading
+    ("polls", "<u8"),
+    ("errors", "<u8"),          # failed attempts, retries included
+    ("failures", "<u4"),        # polls failed in a row (after their retries)
+    ("error", "<U64"),          # last error, kept after recovering
+])
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Feed:
+    url: str
+    intersection: int
+    interval: float = 2.0   # s between polls (start to start)
+    timeout: float = 2.0    # s per attempt: connect, request and full response
+    retries: int = 2        # further attempts within a poll, with backoff
+    jitter: float = 0.1     # each interval is stretched or shrunk by up to this fraction
+    stale_after: Optional[float] = None  # s; None for STALE_INTERVALS intervals
+
+
+def load_feeds(path):
+    """Feeds from a JSON feeds file (see the module docstring); raises ValueError on a bad file."""
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    defaults = spec.get("defaults", {}) if isinstance(spec, dict) else {}
+    entries = spec.get("feeds", []) if isinstance(spec, dict) else spec
+    feeds = []
+    try:
+        for entry in entries:
+            entry = {**defaults, **entry}
+            if "intersections" in entry:
+                start, stop = entry.pop("intersections")
+                url = entry.pop("url")
+                feeds += [Feed(url.replace("{id}", str(i)), i, **entry) for i in range(start, stop)]
+            else:
+                entry.setdefault("intersection", len(feeds))
+                feeds.append(Feed(**entry))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{path}: every feed needs a url and an intersection (or an intersections range): {e}")
+    ids = [f.intersection for f in feeds]
+    if not feeds or min(ids) < 0 or len(set(ids)) != len(ids):
+        raise ValueError(f"{path}: feeds must cover distinct, non-negative intersections")
+    for f in feeds:
+        if urlsplit(f.url).scheme not in ("http", "https") or f.interval <= 0 or f.timeout <= 0:
+            raise ValueError(f"{path}: {f.url}: need an http(s) URL and a positive interval and timeout")
+    return feeds
+
+
+def feed_intersections(path):
+    """City size a feeds file implies: one past its highest intersection id."""
+    return max(f.intersection for f in load_feeds(path)) + 1
+
+
+def parse_reading(body):
+    """Approach counts from a feed body in the /traffic format; raises ValueError on anything else."""
+    try:
+        data = json.loads(body)
+        counts = [int(data[r]["vehicles"]) for r in ROADS]
+    except (KeyError, TypeError, ValueError, OverflowError) as e:
+        raise ValueError(f"unexpected payload: {e!r}")
+    if min(counts) < 0:
+        raise ValueError(f"negative vehicle count: {counts}")
+    return counts
+
+
+async def _exchange(reader, writer, request):
+    """One HTTP/1.1 request on an open connection: (status, headers, body, keep_alive)."""
+    writer.write(request)
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ConnectionResetError("connection closed by the server")
+    version, status = line.split(None, 2)[:2]
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    status = int(status)
+    framed = True
+    if status == 304 or status == 204:
+        body = b""
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        parts = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                while await reader.readline() not in (b"\r\n", b"\n", b""):
+                    pass  # trailers
+                break
+            if sum(map(len, parts)) + size > MAX_BODY:
+                raise ValueError("response too large")
+            parts.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(parts)
+    elif "content-length" in headers:
+        size = int(headers["content-length"])
+        if size > MAX_BODY:
+            raise ValueError("response too large")
+        body = await reader.readexactly(size)
+    else:
+        parts = []  # delimited by the server closing the connection
+        while chunk := await reader.read(65536):
+            parts.append(chunk)
+            if sum(map(len, parts)) > MAX_BODY:
+                raise ValueError("response too large")
+        body = b"".join(parts)
+        framed = False
+    if headers.get("content-encoding") == "gzip":
+        try:
+            body = gzip.decompress(body)
+        except (OSError, EOFError, zlib.error) as e:
+            raise ValueError(f"bad gzip body: {e}")
+    keep_alive = framed and version == b"HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    return status, headers, body, keep_alive
+
+
+class FeedCollector:
+    """Polls every feed concurrently on one asyncio thread and keeps the merged counts.
+
+    Feeds to the same host share a pool of keep-alive connections, and a
+    feed that answers 304 to its last ETag counts as a good, unchanged
+    reading. read() is the count-source interface CityState ticks from:
+    the latest counts of every intersection, stale ones included (see
+    status() for which are stale). With `folder`, the per-feed status is
+    also published there for processes that do not run the collector.
+    """
+
+    def __init__(self, feeds, n=None, concurrency=CONCURRENCY, folder=None, seed=None):
+        self.feeds = feeds
+        self.n = max(f.intersection for f in feeds) + 1 if n is None else n
+        self.concurrency = concurrency
+        self.folder = folder
+        self.rng = random.Random(seed)
+        self.counts = np.zeros((self.n, len(ROADS)), dtype=np.uint16)
+        self.table = np.zeros(len(feeds), dtype=STATUS_DTYPE)
+        self.table["id"] = [f.intersection for f in feeds]
+        self.table["ok_ms"] = -1
+        self.table["stale_after_ms"] = [1000 * (f.stale_after or STALE_INTERVALS * f.interval) for f in feeds]
+        self.etags = [None] * len(feeds)
+        self.idle = {}  # (scheme, host, port) -> [(reader, writer), ...]
+        self.tls = None  # one TLS context for every https feed, made on first use
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=lambda: asyncio.run(self._main()), name="feed-collector", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def read(self, now=None):
+        """Latest counts of every intersection (a new array)."""
+        with self.lock:
+            return self.counts.copy()
+
+    def status(self):
+        """Per-feed status: a STATUS_DTYPE array, one row per feed."""
+        with self.lock:
+            return self.table.copy()
+
+    async def _main(self):
+        self.slots = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.create_task(self._follow(i, feed)) for i, feed in enumerate(self.feeds)]
+        if self.folder:
+            tasks.append(asyncio.create_task(self._publish()))
+        await asyncio.gather(*tasks)
+
+    async def _follow(self, i, feed):
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(self.rng.uniform(0, feed.interval))  # spread the first round over an interval
+        while True:
+            started = loop.time()
+            try:
+                await self._poll(i, feed)
+            except Exception as e:  # a feed failing in a way _poll did not foresee must not end the others
+                with self.lock:
+                    self.table["errors"][i] += 1
+                self._failed(i, f"{type(e).__name__}: {e}")
+            interval = feed.interval * (1 + self.rng.uniform(-feed.jitter, feed.jitter))
+            await asyncio.sleep(max(0.0, started + interval - loop.time()))
+
+    async def _poll(self, i, feed):
+        error = None
+        for attempt in range(feed.retries + 1):
+            if attempt:
+                # Jittered exponential backoff, never past the feed's next scheduled poll
+                backoff = min(RETRY_BACKOFF * 2 ** (attempt - 1), feed.interval / 2)
+                await asyncio.sleep(backoff * self.rng.uniform(0.5, 1.5))
+            try:
+                async with self.slots:
+                    started = time.perf_counter()
+                    counts = await asyncio.wait_for(self._fetch(i, feed), feed.timeout)
+            except asyncio.TimeoutError:
+                error = f"timed out after {feed.timeout:g}s"
+            except (OSError, EOFError, ValueError) as e:
+                error = str(e) or type(e).__name__
+            else:
+                self._record(i, feed, counts, (time.perf_counter() - started) * 1000)
+                return
+            with self.lock:
+                self.table["errors"][i] += 1
+        self._failed(i, error)
+
+    def _failed(self, i, error):
+        with self.lock:
+            row = self.table[i:i + 1]
+            row["polls"] += 1
+            row["failures"] += 1
+            row["error"] = error[:64]
+
+    def _record(self, i, feed, counts, latency_ms):
+        with self.lock:
+            if counts is not None:  # None: 304, the last reading still holds
+                self.counts[feed.intersection] = np.clip(counts, 0, np.iinfo(np.uint16).max)
+            row = self.table[i:i + 1]
+            row["ok_ms"] = int(time.time() * 1000)
+            row["latency_ms"] = latency_ms
+            row["polls"] += 1
+            row["failures"] = 0
+
+    async def _fetch(self, i, feed):
+        url = urlsplit(feed.url)
+        https = url.scheme == "https"
+        if https and self.tls is None:
+            self.tls = ssl.create_default_context()
+        origin = (url.scheme, url.hostname, url.port or (443 if https else 80))
+        path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        request = (f"GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\nAccept: application/json\r\n"
+                   f"Accept-Encoding: gzip\r\nUser-Agent: traffic-collector\r\n")
+        if self.etags[i]:
+            request += f"If-None-Match: {self.etags[i]}\r\n"
+        request = (request + "\r\n").encode("latin-1")
+        for reuse in (True, False):
+            conn = self.idle.get(origin, []).pop() if reuse and self.idle.get(origin) else None
+            if conn is None:
+                reuse = False
+                conn = await asyncio.open_connection(origin[1], origin[2], ssl=self.tls if https else None)
+            try:
+                status, headers, body, keep_alive = await _exchange(*conn, request)
+            except (ConnectionError, EOFError):
+                conn[1].close()
+                if reuse:
+                    continue  # the server closed the idle connection meanwhile: once more on a new one
+                raise
+            except BaseException:
+                conn[1].close()  # timed out or broken mid-response: the connection is unusable
+                raise
+            pool = self.idle.setdefault(origin, [])
+            if keep_alive and len(pool) < self.concurrency:
+                pool.append(conn)
+            else:
+                conn[1].close()
+            if status == 304:
+                return None
+            if status != 200:
+                raise ValueError(f"HTTP {status}")
+            self.etags[i] = headers.get("etag")
+            return parse_reading(body)
+
+    async def _publish(self):
+        path = os.path.join(self.folder, STATUS_FILE)
+        failing = False
+        while True:
+            await asyncio.sleep(STATUS_EVERY)
+            try:
+                with open(path + ".tmp", "wb") as f:  # renamed into place: readers never see half a file
+                    np.save(f, self.status())
+                os.replace(path + ".tmp", path)
+            except OSError:
+                # Folder gone or disk full: the feeds keep polling and the next round tries again
+                if not failing:
+                    log.exception("could not publish feed status to %s", path)
+                failing = True
+            else:
+                failing = False
+
+
+def read_status(folder):
+    """The status a collector last published to `folder`, or None."""
+    try:
+        return np.load(os.path.join(folder, STATUS_FILE))
+    except (OSError, ValueError):
+        return None
+
+
+def report(table, now_ms):
+    """Feed health as of `now_ms` for a status table: per-feed columns, totals and the last errors of failing feeds."""
+    # Clamped at 0: a feed polled after `now_ms` was taken is fresh, not the -1 "never read"
+    age = np.where(table["ok_ms"] >= 0, np.maximum(now_ms - table["ok_ms"], 0), -1)
+    stale = (age < 0) | (age > table["stale_after_ms"])
+    failing = np.flatnonzero(stale | (table["failures"] > 0))[:50]
+    return {
+        "feeds": int(table.size),
+        "stale_feeds": int(stale.sum()),
+        "polls": int(table["polls"].sum()),
+        "errors": {str(table["id"][i]): str(table["error"][i]) for i in failing.tolist() if table["error"][i]},
+        "ids": table["id"],
+        "age_ms": age,  # since the last good reading; -1 before the first
+        "stale": stale,
+        "failures": table["failures"],
+        "latency_ms": np.round(table["latency_ms"], 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll a feeds file and report collection rate and health.")
+    parser.add_argument("path", help="feeds JSON file")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    args = parser.parse_args()
+
+    collector = FeedCollector(load_feeds(args.path), concurrency=args.concurrency).start()
+    print(f"{len(collector.feeds)} feeds, {collector.n} intersections")
+    began, polls = time.time(), 0
+    while time.time() - began < args.seconds:
+        time.sleep(1.0)
+        table = collector.status()
+        done = int(table["polls"].sum())
+        health = report(table, int(time.time() * 1000))
+        latency = table["latency_ms"][table["ok_ms"] >= 0]
+        print(f"{done - polls:5d} polls/s | stale {health['stale_feeds']:4d} | errors {int(table['errors'].sum()):5d} | "
+              f"latency p50 {np.median(latency) if latency.size else 0:.1f} ms")
+        polls = done
@@ -0,0 +1,105 @@
+import datetime
+import threading
+
+import numpy as np
+
+STEP_S = 60              # the models step once per minute of (averaged) samples
+SEASON_SLOT_MIN = 15     # daily seasonality resolution
+SEASON_SLOTS = 24 * 60 // SEASON_SLOT_MIN
+HORIZONS_MIN = (5, 15, 30, 60)
+ALPHA = 0.3    # level
+BETA = 0.05    # trend
+GAMMA = 0.1    # season
+PHI = 0.98     # trend damping per step; keeps hour-ahead forecasts from running away
+
+
+def season_slot(ts_ms):
+    """Daily slot of a timestamp, in local time (rush hours follow the local clock)."""
+    t = datetime.datetime.fromtimestamp(ts_ms / 1000)
+    return (t.hour * 60 + t.minute) // SEASON_SLOT_MIN
+
+
+class Forecaster:
+    """Damped additive Holt-Winters per (intersection, approach), updated online.
+
+    Ticks are averaged into one-minute steps; each closed step updates level,
+    trend and the current daily season slot of every series in one vectorized
+    pass. Memory is fixed (level, trend and SEASON_SLOTS season values per
+    series) and nothing is ever refit, so an update costs the same on day one
+    as on day one hundred. Seasonality starts at zero and is learned as days
+    go by; until then forecasts are damped Holt trends.
+    """
+
+    def __init__(self, n_intersections, n_approaches, step_s=STEP_S, alpha=ALPHA, beta=BETA, gamma=GAMMA, phi=PHI):
+        shape = (n_intersections, n_approaches)
+        self.step_ms = int(step_s * 1000)
+        self.alpha, self.beta, self.gamma, self.phi = alpha, beta, gamma, phi
+        self.level = np.zeros(shape, dtype=np.float32)
+        self.trend = np.zeros(shape, dtype=np.float32)
+        self.season = np.zeros((SEASON_SLOTS,) + shape, dtype=np.float32)  # slot-major: one slot is contiguous
+        self.acc = np.zeros(shape, dtype=np.float64)  # sum of the open step's samples
+        self.acc_n = 0
+        self.step = None       # index of the open step (ts_ms // step_ms)
+        self.steps = 0         # closed steps so far
+        self.last_ts = None    # newest sample seen, for catch_up()
+        self.lock = threading.Lock()
+        self.feed_lock = threading.Lock()  # one catch_up at a time, so no sample is added twice
+
+    @property
+    def nbytes(self):
+        return self.level.nbytes + self.trend.nbytes + self.season.nbytes + self.acc.nbytes
+
+    def add(self, ts_ms, counts):
+        """Add one tick of (intersections x approaches) counts."""
+        with self.lock:
+            if self.last_ts is not None and ts_ms <= self.last_ts:
+                return  # already seen (or the clock went back)
+            step = ts_ms // self.step_ms
+            if self.step is not None and step != self.step and self.acc_n:
+                self._update(self.step * self.step_ms, self.acc / self.acc_n)
+                self.acc[:] = 0
+                self.acc_n = 0
+            self.step = step
+            self.acc += counts
+            self.acc_n += 1
+            self.last_ts = ts_ms
+
+    def catch_up(self, history):
+        """Feed every sample in a RingHistory that is newer than the last one added."""
+        with self.feed_lock:
+            ts, counts = history.range(None if self.last_ts is None else self.last_ts + 1)
+            for t, c in zip(ts.tolist(), counts):
+                self.add(t, c)
+
+    def _update(self, ts_ms, y):
+        slot = season_slot(ts_ms)
+        season = self.season[slot]
+        if self.steps == 0:
+            self.level[:] = y - season
+        else:
+            prev_level = self.level.copy()
+            damped = self.phi * self.trend
+            self.level[:] = self.alpha * (y - season) + (1 - self.alpha) * (prev_level + damped)
+            self.trend[:] = self.beta * (self.level - prev_level) + (1 - self.beta) * damped
+        season += self.gamma * (y - self.level - season)  # in place: updates self.season[slot]
+        self.steps += 1
+
+    def forecast(self, minutes, ids=None, now_ms=None):
+        """(len(ids), approaches) expected counts `minutes` ahead of the newest sample (never negative)."""
+        with self.lock:
+            if not self.steps:
+                return None
+            h = max(1, int(round(minutes * 60_000 / self.step_ms)))
+            # Sum of phi^1..phi^h: how much of the current trend survives damping over h steps
+            damping = self.phi * (1 - self.phi ** h) / (1 - self.phi) if self.phi < 1 else h
+            rows = slice(None) if ids is None else ids
+            base = now_ms if now_ms is not None else self.last_ts
+            slot = season_slot(base + minutes * 60_000)
+            out = self.level[rows] + damping * self.trend[rows] + self.season[slot][rows]
+        return np.maximum(out, 0)
+
+    def forecasts(self, ids=None, horizons=HORIZONS_MIN):
+        """(len(horizons), len(ids), approaches) array, or None before the first closed minute."""
+        parts = [self.forecast(m, ids) for m in horizons]
+        return None if parts[0] is None else np.stack(parts)
+
@@ -2,6 +2,7 @@ import streamlit as st
 import random
 from datetime import datetime
 from streamlit_autorefresh import st_autorefresh
+from signal_engine import plan_for
 
 # Auto-refresh every 2 seconds (2000 milliseconds)
 st_autorefresh(interval=2000, key="auto_refresh")
@@ -18,12 +19,8 @@ adjustment_factor = 30
 # Generate random vehicle counts for each road
 vehicle_counts = {road: random.randint(5, 40) for road in roads}
 
-# Calculate total vehicles and green light durations proportional to traffic
-total_vehicles = sum(vehicle_counts.values())
-green_times = {
-    road: int(base_time + (vehicle_counts[road] / total_vehicles) * adjustment_factor)
-    for road in roads
-}
+# Green light durations proportional to traffic
+green_times, _, total_waiting_time = plan_for(vehicle_counts, base_time=base_time, adjustment_factor=adjustment_factor)
 
 # Display metrics for each road in columns
 col1, col2, col3, col4 = st.columns(4)
@@ -45,9 +42,6 @@ for road in roads:
 st.text(display)
 
 # Summary metric: total waiting units (simplified calculation)
-total_waiting_time = sum(
-    vehicle_counts[road] * green_times[road] for road in roads
-)
 st.metric("Estimated Total Waiting Units", total_waiting_time)
 
 # Timestamp of last update
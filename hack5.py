@@ -1,10 +1,11 @@
 import streamlit as st
-import requests
 from datetime import datetime
 from streamlit_autorefresh import st_autorefresh
 import random
 import plotly.graph_objects as go
 from streamlit_extras.metric_cards import style_metric_cards
+from traffic_client import client
+from signal_engine import plan_for
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="AI Smart Traffic Controller", layout="wide")
@@ -55,26 +56,24 @@ st.markdown("<p class='sub-title'>Real-time Intelligent Traffic Optimization Das
 
 # --- API CALL ---
 api_url = "http://127.0.0.1:5000/traffic"  # Replace with your actual API endpoint
-try:
-    response = requests.get(api_url)
-    response.raise_for_status()
-    data = response.json()
+data, error = client.get_json(api_url)
+if data is not None:
     vehicle_counts = {
         d: data.get(d, {}).get("vehicles", random.randint(5, 40))
         for d in ["North", "South", "East", "West"]
     }
     timestamp = data.get("timestamp", "Unknown")
-except Exception as e:
-    st.warning(f"⚠️ API offline or unreachable: {e}")
+    if error:
+        st.warning(f"⚠️ API unreachable, showing cached reading: {error}")
+else:
+    st.warning(f"⚠️ API offline or unreachable: {error}")
     vehicle_counts = {r: random.randint(5, 40) for r in ["North", "South", "East", "West"]}
     timestamp = "Offline Mode"
 
 # --- AI LOGIC ---
 base_time = 15
 adjustment_factor = 30
-total = sum(vehicle_counts.values())
-green_times = {r: int(base_time + (vehicle_counts[r]/total)*adjustment_factor) for r in vehicle_counts}
-active_road = max(green_times, key=green_times.get)
+green_times, active_road, total_wait = plan_for(vehicle_counts, base_time=base_time, adjustment_factor=adjustment_factor)
 
 # --- SIDEBAR CONTROL PANEL ---
 st.sidebar.header("🧠 Control Panel")
@@ -126,7 +125,6 @@ for i, r in enumerate(vehicle_counts):
     cols2[i].markdown(f"<h4 style='text-align:center'>{r}<br>{light}</h4>", unsafe_allow_html=True)
 
 # --- PERFORMANCE STATS ---
-total_wait = sum([vehicle_counts[r]*green_times[r] for r in vehicle_counts])
 st.metric("⏱️ Estimated Total Waiting Units", total_wait)
 st.caption(f"Last updated: {datetime.now().strftime('%H:%M:%S')} | API timestamp: {timestamp}")
 
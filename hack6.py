@@ -1,324 +1,25 @@
 import streamlit as st
-import requests
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import json
-
-from streamlit_lottie import st_lottie
-from streamlit_option_menu import option_menu
-from PIL import Image
-
-# Load Lottie animation
-def load_lottieurl(url):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
-def load_lottiefile(filepath: str):
-    with open(filepath, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-# Example animation (AI or traffic theme)lottie_ai = load_lottiefile("C:/Users/amite/OneDrive/ドキュメント/hackathon/Traffic concept.json")
-lottie_ai = load_lottiefile("C:/Users/amite/OneDrive/ドキュメント/hackathon/Traffic concept.json")
 
 # --- PAGE SETUP ---
 st.set_page_config(page_title="AI Traffic Optimizer", page_icon="🚦", layout="wide")
 
-# --- SIDEBAR ---
-with st.sidebar:
-    selected = option_menu(
-        "Navigation",
-        ["Home", "Analytics", "Predict", "About"],
-        icons=["house", "bar-chart", "cpu", "info-circle"],
-        menu_icon="cast",
-        default_index=0,
-    )
-
-# --- HEADER ---
-st.title("🚦 AI-Powered Traffic Light Optimization System")
-st.caption("Built for Smart Cities | Hackathon Prototype")
-
-# --- HOME PAGE ---
-if selected == "Home":
-    st_lottie(lottie_ai, height=300, key="ai")
-    st.markdown("""
-    ### 🧩 What It Does
-    Our model adjusts **traffic signal timing** dynamically based on real-time traffic density, improving flow and reducing pollution.
-    
-    ### 🌍 Core Features
-    - Real-time data input via API  
-    - AI-based optimization logic  
-    - Data analytics visualization  
-    - Predictive insights for future congestion
-    """)
-
-# --- ANALYTICS PAGE ---
-elif selected == "Analytics":
-    st.subheader("📊 Live Data Visualization")
-
-    # Simulate data
-    df = pd.DataFrame({
-        "Time": pd.date_range("2025-11-01", periods=10, freq="H"),
-        "Traffic Density": np.random.randint(20, 100, 10),
-        "Average Speed (km/h)": np.random.randint(20, 60, 10),
-    })
-
-    st.line_chart(df.set_index("Time"))
-
-    # Plotly chart
-    fig = px.scatter(df, x="Traffic Density", y="Average Speed (km/h)",
-                     color="Traffic Density", size="Average Speed (km/h)",
-                     title="Speed vs Density Relationship")
-    st.plotly_chart(fig, use_container_width=True)
+# --- PAGES ---
+# Each page is its own script under views/; its heavy imports (pandas, plotly,
+# lottie, ...) only happen the first time that page is opened.
+home = st.Page("views/home.py", title="Home", icon=":material/home:", default=True)
+analytics = st.Page("views/analytics.py", title="Analytics", icon=":material/bar_chart:")
+predict = st.Page("views/predict.py", title="Predict", icon=":material/memory:")
+about = st.Page("views/about.py", title="About", icon=":material/info:")
+city = st.Page("views/city.py", title="City Overview", icon=":material/map:")
+live = st.Page("views/live.py", title="Live Controller", icon=":material/traffic:")
+corridor = st.Page("views/corridor.py", title="Green Wave", icon=":material/waves:")
+impact = st.Page("views/impact.py", title="Impact", icon=":material/eco:")
 
-# --- PREDICT PAGE ---
-elif selected == "Predict":
-    st.subheader("⚙️ Run Optimization")
-
-    road = st.text_input("Enter Road Name / ID")
-    traffic_input = st.slider("Traffic Density", 0, 100, 50)
-    weather = st.selectbox("Weather Condition", ["Sunny", "Rainy", "Foggy", "Night"])
-
-    if st.button("Optimize"):
-        # Call your API
-        try:
-            response = requests.get(f"http://127.0.0.1:5000/traffic?road={road}&density={traffic_input}&weather={weather}")
-            if response.status_code == 200:
-                result = response.json()
-                st.success(f"🚦 Optimized Timing: {result['signal_time']} seconds")
-            else:
-                st.warning("⚠️ API did not respond properly. Showing simulated result.")
-                st.info(f"🚦 Suggested Time: {np.random.randint(30, 120)} seconds")
-        except:
-            st.error("API request failed. Check your endpoint or network.")
-
-# --- ABOUT PAGE ---
-elif selected == "About":
-    st.subheader("🧠 About This Project")
-    st.write("""
-    - Developed for urban mobility improvement.  
-    - Powered by AI, data visualization, and live API integration.  
-    - Team Goal: Build scalable city-level infrastructure solutions.  
-    """)
-    st.image("https://cdn.pixabay.com/photo/2017/06/22/18/33/traffic-2432908_1280.jpg", use_container_width=True)
-import requests
-from datetime import datetime
-from streamlit_autorefresh import st_autorefresh
-import random
-import plotly.graph_objects as go
-from streamlit_extras.metric_cards import style_metric_cards
-
-# --- PAGE CONFIG ---
-st.set_page_config(page_title="AI Smart Traffic Controller", layout="wide")
-
-# --- AUTO REFRESH ---
-st_autorefresh(interval=3000, key="refresh")
-
-# --- CUSTOM CSS (modern UI theme) ---
-st.markdown("""
-    <style>
-    body {
-        background: radial-gradient(circle at top left, #111, #1c1c1c);
-        color: white;
-        font-family: 'Poppins', sans-serif;
-    }
-    h1, h2, h3 {
-        color: #00E6FF;
-        text-align: center;
-        letter-spacing: 0.5px;
-    }
-    .main-title {
-        text-align: center;
-        font-size: 2.5rem;
-        color: #00E6FF;
-        text-shadow: 0px 0px 15px #00E6FF;
-        margin-bottom: 1rem;
-    }
-    .sub-title {
-        text-align: center;
-        color: #bdbdbd;
-        font-size: 1rem;
-        margin-bottom: 2rem;
-    }
-    div[data-testid="stMetricValue"] {
-        font-size: 28px;
-        color: #00FFB3;
-    }
-    div[data-testid="stMetricLabel"] {
-        color: #ccc;
-        font-weight: bold;
-    }
-    </style>
-""", unsafe_allow_html=True)
+selected = st.navigation({"Overview": [home, analytics, predict, about], "Operations": [city, live, corridor, impact]})
 
 # --- HEADER ---
-st.markdown("<h1 class='main-title'>🚦 AI-Powered Smart Traffic Controller</h1>", unsafe_allow_html=True)
-st.markdown("<p class='sub-title'>Real-time Intelligent Traffic Optimization Dashboard</p>", unsafe_allow_html=True)
-
-# --- API CALL ---
-api_url = "http://127.0.0.1:5000/traffic"  # Replace with your actual API endpoint
-try:
-    response = requests.get(api_url)
-    response.raise_for_status()
-    data = response.json()
-    vehicle_counts = {
-        d: data.get(d, {}).get("vehicles", random.randint(5, 40))
-        for d in ["North", "South", "East", "West"]
-    }
-    timestamp = data.get("timestamp", "Unknown")
-except Exception as e:
-    st.warning(f"⚠️ API offline or unreachable: {e}")
-    vehicle_counts = {r: random.randint(5, 40) for r in ["North", "South", "East", "West"]}
-    timestamp = "Offline Mode"
-
-# --- AI LOGIC ---
-base_time = 15
-adjustment_factor = 30
-total = sum(vehicle_counts.values())
-green_times = {r: int(base_time + (vehicle_counts[r]/total)*adjustment_factor) for r in vehicle_counts}
-active_road = max(green_times, key=green_times.get)
-
-# --- SIDEBAR CONTROL PANEL ---
-st.sidebar.header("🧠 Control Panel")
-mode = st.sidebar.radio("Mode:", ["AI Decision", "Manual Override"])
-if mode == "Manual Override":
-    active_road = st.sidebar.selectbox("Select Green Light Lane:", list(vehicle_counts.keys()))
-
-# --- AI STATUS CARD ---
-if mode == "AI Decision":
-    st.info(f"🤖 AI Optimized Signal: Prioritizing **{active_road}** lane based on live congestion.")
-else:
-    st.success(f"🕹️ Manual Override Active — Green light set to **{active_road}** lane.")
-
-# --- LIVE METRICS ---
-cols = st.columns(4)
-for i, r in enumerate(vehicle_counts):
-    delta_color = "inverse" if r == active_road else "normal"
-    cols[i].metric(f"{r} Lane", f"{vehicle_counts[r]} cars", f"{green_times[r]}s", delta_color=delta_color)
-style_metric_cards(border_color="#00E6FF", border_left_color="#00FF99")
-
-# --- BAR CHART ---
-st.markdown("### 📊 Traffic Load Analysis")
-fig = go.Figure()
-fig.add_trace(go.Bar(
-    x=list(vehicle_counts.keys()),
-    y=list(vehicle_counts.values()),
-    marker_color=["#2ECC71" if r == active_road else "#E74C3C" for r in vehicle_counts],
-    text=[f"{green_times[r]}s green" for r in vehicle_counts],
-    textposition='outside'
-))
-fig.update_layout(
-    template="plotly_dark",
-    title="Real-Time Vehicle Density",
-    xaxis_title="Direction",
-    yaxis_title="Vehicle Count",
-    height=450,
-    font=dict(color='white')
-)
-st.plotly_chart(fig, use_container_width=True)
-
-# --- INTERSECTION VISUAL ---
-st.markdown("### 🛣️ Intersection View")
-cols2 = st.columns(4)
-for i, r in enumerate(vehicle_counts):
-    if r == active_road:
-        light = "<span style='font-size:40px;'>🟢</span>"
-    else:
-        light = "<span style='font-size:40px;'>🔴</span>"
-    cols2[i].markdown(f"<h4 style='text-align:center'>{r}<br>{light}</h4>", unsafe_allow_html=True)
-
-# --- PERFORMANCE STATS ---
-total_wait = sum([vehicle_counts[r]*green_times[r] for r in vehicle_counts])
-st.metric("⏱️ Estimated Total Waiting Units", total_wait)
-st.caption(f"Last updated: {datetime.now().strftime('%H:%M:%S')} | API timestamp: {timestamp}")
-
-# --- FOOTER ---
-st.markdown("""
----
-<div style="text-align:center; color:#aaa;">
-✅ Powered by AI-based adaptive control system <br>
-💡 Hackathon Project 2025 | Urban Infrastructure Track
-</div>
-""", unsafe_allow_html=True)
-
-import streamlit as st
-import random
-import matplotlib.pyplot as plt
-
-st.set_page_config(page_title="AI Traffic Optimizer", layout="wide")
-st.title("🚦 AI-Powered Smart Traffic Optimization Dashboard")
-
-st.markdown("""
-### 🌍 Objective  
-Reduce congestion, emissions, and waiting time through AI-optimized signal control.
-""")
-
-# --- Generate Simulated Metrics ---
-waiting_before = random.uniform(90, 150)   # in seconds
-waiting_after = waiting_before * random.uniform(0.45, 0.7)
-co2_before = random.uniform(300, 500)      # grams per cycle
-co2_after = co2_before * random.uniform(0.5, 0.8)
-fuel_before = random.uniform(0.6, 1.0)     # liters per cycle
-fuel_after = fuel_before * random.uniform(0.5, 0.8)
-time_saved = waiting_before - waiting_after
-co2_saved = co2_before - co2_after
-fuel_saved = fuel_before - fuel_after
-
-# --- Metrics Display ---
-st.markdown("### 📊 Real-Time Impact Metrics")
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.metric("⏱ Avg Waiting Time (Before)", f"{waiting_before:.1f}s")
-    st.metric("🌫 CO₂ Emission (Before)", f"{co2_before:.1f}g")
-    st.metric("⛽ Fuel Wastage (Before)", f"{fuel_before:.2f}L")
-
-with col2:
-    st.metric("✅ Avg Waiting Time (After)", f"{waiting_after:.1f}s", delta=f"-{time_saved:.1f}s saved")
-    st.metric("🌍 CO₂ Emission (After)", f"{co2_after:.1f}g", delta=f"-{co2_saved:.1f}g saved")
-    st.metric("⚡ Fuel Used (After)", f"{fuel_after:.2f}L", delta=f"-{fuel_saved:.2f}L saved")
-
-with col3:
-    st.success(f"🕒 **Time Saved:** {time_saved:.1f} sec")
-    st.success(f"🌱 **CO₂ Reduced:** {co2_saved:.1f} g")
-    st.success(f"💧 **Fuel Saved:** {fuel_saved:.2f} L")
-
-# --- Comparison Charts ---
-st.markdown("### 📈 Visual Comparison")
-fig, axs = plt.subplots(1, 3, figsize=(15, 4))
-
-# Waiting Time
-axs[0].bar(["Before", "After"], [waiting_before, waiting_after], color=["#FF4B4B", "#4CFF4B"])
-axs[0].set_title("Avg Waiting Time (sec)")
-
-# CO2
-axs[1].bar(["Before", "After"], [co2_before, co2_after], color=["#FF4B4B", "#4CFF4B"])
-axs[1].set_title("CO₂ Emission (g)")
-
-# Fuel
-axs[2].bar(["Before", "After"], [fuel_before, fuel_after], color=["#FF4B4B", "#4CFF4B"])
-axs[2].set_title("Fuel Wastage (L)")
-
-st.pyplot(fig)
-
-# --- Summary ---
-st.markdown("""
-### 🧠 AI System Highlights
-- Dynamically adjusts green light timing based on real-time vehicle count.  
-- Reduces idle duration at low-traffic signals.  
-- Demonstrates measurable improvement in both **time and emissions**.  
-- Scalable to entire city intersections through IoT-enabled signals.
-
----
-
-### 🏁 Results Summary
-| Metric | Before | After | Improvement |
-|:-------|:--------|:-------|:-------------|
-| Avg Waiting Time | {:.1f}s | {:.1f}s | {:.1f}s faster |
-| CO₂ Emission | {:.1f}g | {:.1f}g | {:.1f}g less |
-| Fuel Usage | {:.2f}L | {:.2f}L | {:.2f}L saved |
+if selected.title in {"Home", "Analytics", "Predict", "About"}:
+    st.title("🚦 AI-Powered Traffic Light Optimization System")
+    st.caption("Built for Smart Cities | Hackathon Prototype")
 
-✅ *AI-Optimized traffic control system reduces both congestion and environmental impact effectively.*
-""".format(waiting_before, waiting_after, time_saved, co2_before, co2_after, co2_saved, fuel_before, fuel_after, fuel_saved))
+selected.run()
@@ -0,0 +1,133 @@
+import os
+import threading
+
+import numpy as np
+
+
+class RingHistory:
+    """Fixed-memory history of (intersections x approaches) counts, one row per tick.
+
+    Everything is preallocated: int64 epoch-millisecond timestamps and a
+    time-major uint16 count block, so appending a tick is one contiguous copy
+    and memory never grows. Once full, the oldest tick is overwritten.
+    """
+
+    def __init__(self, n_intersections, n_approaches, capacity):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.counts = np.zeros((capacity, n_intersections, n_approaches), dtype=np.uint16)
+        self.head = 0  # next physical slot to write
+        self.size = 0
+        self.lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self.ts.nbytes + self.counts.nbytes
+
+    def append(self, ts_ms, counts):
+        with self.lock:
+            self.ts[self.head] = ts_ms
+            self.counts[self.head] = counts
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+
+    def latest(self):
+        """(ts_ms, counts) of the newest tick, or (0, None) before the first append."""
+        size, head = self.size, self.head
+        if not size:
+            return 0, None
+        last = (head - 1) % self.capacity
+        return int(self.ts[last]), self.counts[last]
+
+    def at(self, ts_ms):
+        """Counts of the tick stamped exactly ts_ms, or None if it is not (or no longer) held."""
+        ts, counts = self.range(ts_ms, ts_ms + 1)
+        return counts[0] if ts.size else None
+
+    def _segments(self):
+        """Physical (start, stop) slices covering the buffer in time order."""
+        head, size = self.head, self.size  # read once: another process may be appending
+        start = (head - size) % self.capacity
+        if start + size <= self.capacity:
+            return [(start, start + size)]
+        return [(start, self.capacity), (0, head)]
+
+    def range(self, since_ms=None, until_ms=None, ids=None, step=1):
+        """Samples with since_ms <= ts < until_ms, every `step`-th one.
+
+        Returns (timestamps, counts) with counts shaped (time, len(ids), approaches).
+        Each physical segment is searched with searchsorted and read as a slice.
+        """
+        with self.lock:
+            ts_parts, count_parts = [], []
+            offset = 0  # logical index of the segment start
+            anchor = None  # logical index of the first selected sample, keeps `step` aligned across the wrap
+            for lo, hi in self._segments():
+                seg = self.ts[lo:hi]
+                i0 = int(np.searchsorted(seg, since_ms, side="left")) if since_ms is not None else 0
+                i1 = int(np.searchsorted(seg, until_ms, side="left")) if until_ms is not None else seg.size
+                if anchor is None:
+                    if i0 < i1:
+                        anchor = offset + i0
+                else:
+                    i0 += (-(offset + i0 - anchor)) % step
+                if i0 < i1:
+                    ts_parts.append(seg[i0:i1:step].copy())
+                    block = self.counts[lo + i0:lo + i1:step]
+                    count_parts.append(block[:, ids] if ids is not None else block.copy())
+                offset += seg.size
+
+        if not ts_parts:
+            n = self.counts.shape[1] if ids is None else len(ids)
+            return np.zeros(0, dtype=np.int64), np.zeros((0, n, self.counts.shape[2]), dtype=np.uint16)
+        if len(ts_parts) == 1:
+            return ts_parts[0], count_parts[0]
+        return np.concatenate(ts_parts), np.concatenate(count_parts)
+
+
+class SharedRingHistory(RingHistory):
+    """RingHistory kept in memory-mapped .npy files, so one process writes and many read.
+
+    Layout under `folder`: state.npy (head, size), ts.npy and counts.npy,
+    shaped as in RingHistory. Only the writer appends; it fills the slot
+    before publishing head and size, so readers never see a slot that is
+    still being written. Readers are also kept one slot short of the
+    capacity: the oldest visible slot is not the next one to be overwritten.
+    """
+
+    def __init__(self, folder, n_intersections=None, n_approaches=None, capacity=None, writer=False):
+        fmt = np.lib.format
+        paths = [os.path.join(folder, f) for f in ("state.npy", "ts.npy", "counts.npy")]
+        if capacity is not None:
+            # Create (or reset) the files; the creating process is the writer
+            os.makedirs(folder, exist_ok=True)
+            arrays = [
+                fmt.open_memmap(paths[0], mode="w+", dtype=np.int64, shape=(2,)),
+                fmt.open_memmap(paths[1], mode="w+", dtype=np.int64, shape=(capacity,)),
+                fmt.open_memmap(paths[2], mode="w+", dtype=np.uint16, shape=(capacity, n_intersections, n_approaches)),
+            ]
+            writer = True
+        else:
+            arrays = [np.load(p, mmap_mode="r+" if writer else "r") for p in paths]
+        # Plain ndarray views of the maps (the maps stay open through .base), which orjson encodes natively
+        self.state, self.ts, self.counts = (np.asarray(a) for a in arrays)
+        self.capacity = self.ts.shape[0]
+        self.writer = writer
+        self.lock = threading.Lock()
+
+    @property
+    def head(self):
+        return int(self.state[0])
+
+    @head.setter
+    def head(self, value):
+        self.state[0] = value
+
+    @property
+    def size(self):
+        size = int(self.state[1])
+        return size if self.writer else min(size, self.capacity - 1)
+
+    @size.setter
+    def size(self, value):
+        self.state[1] = value
@@ -0,0 +1,264 @@
+import glob
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+import wire
+from signal_engine import ROADS
+
+MAX_PENDING = 500_000    # buffered events; beyond this POSTs get 429 until the flusher catches up
+MAX_EVENTS = 100_000     # per POST
+FLUSH_INTERVAL = 0.25    # s between flushes (sooner when half the buffer is used)
+DETECTOR_STALE_MS = 30_000  # a reported cell falls back to the generated count after this long without news
+MAX_CLOCK_SKEW_MS = 5000  # detector clocks may run this far ahead; later timestamps would pin their cells
+FIELDS = ("intersection", "approach", "timestamp", "count")
+ROAD_INDEX = {r: i for i, r in enumerate(ROADS)}
+SPOOL_PATTERN = "ingest-*.npy"
+EVENT_DTYPE = np.dtype([("cell", "<i8"), ("count", "<u2"), ("ts", "<i8")])
+
+log = logging.getLogger(__name__)
+
+
+def parse_events(body, mimetype, n, now_ms=None):
+    """Validated (cells, counts, timestamps) arrays for one POSTed batch; raises ValueError.
+
+    Accepts a JSON list of {intersection, approach, timestamp, count} objects,
+    a JSON object of equal-length columns with those names, or the same
+    columns as a wire.MIME body. approach is a road name or index; timestamp
+    is epoch milliseconds, defaults to the time of arrival and may be at most
+    MAX_CLOCK_SKEW_MS ahead of it (a future event would otherwise outrank
+    every real reading of its cell). A cell is
+    intersection * approaches + approach, a flat index into the count matrix.
+    """
+    if mimetype == wire.MIME:
+        columns = wire.decode(body)
+    else:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise ValueError("body must be JSON (or wire.MIME columns)")
+        if isinstance(data, dict) and "events" in data:
+            data = data["events"]
+        if isinstance(data, list):
+            if not all(isinstance(e, dict) for e in data):
+                raise ValueError("events must be objects")
+            columns = {f: [e.get(f) for e in data] for f in FIELDS}
+        elif isinstance(data, dict):
+            columns = data
+        else:
+            raise ValueError("POST a list of events or an object of columns")
+
+    if not isinstance(columns, dict):
+        raise ValueError("POST a list of events or an object of columns")
+    approach = columns.get("approach")
+    if isinstance(approach, list) and any(isinstance(a, str) for a in approach):
+        approach = [ROAD_INDEX.get(a, -1) if isinstance(a, str) else a for a in approach]
+    ids = _integers(columns.get("intersection"), "intersection")
+    if ids.size > MAX_EVENTS:
+        raise ValueError(f"at most {MAX_EVENTS} events per request")
+    timestamps = columns.get("timestamp")
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    if timestamps is None:
+        timestamps = np.full(ids.size, now_ms, dtype=np.int64)
+    elif isinstance(timestamps, list) and None in timestamps:
+        timestamps = [now_ms if t is None else t for t in timestamps]
+    approach = _integers(approach, "approach")
+    counts = _integers(columns.get("count"), "count")
+    ts = _integers(timestamps, "timestamp")
+    if not ids.shape == approach.shape == counts.shape == ts.shape:
+        raise ValueError("columns must be of equal length")
+    if ids.size and (ids.min() < 0 or ids.max() >= n):
+        raise ValueError(f"intersection must be in [0, {n})")
+    if approach.size and (approach.min() < 0 or approach.max() >= len(ROADS)):
+        raise ValueError(f"approach must be one of {', '.join(ROADS)} (or 0-{len(ROADS) - 1})")
+    if counts.size and (counts.min() < 0 or counts.max() > np.iinfo(np.uint16).max):
+        raise ValueError("count must be between 0 and 65535")
+    if ts.size and (ts.min() <= 0 or ts.max() > now_ms + MAX_CLOCK_SKEW_MS):
+        raise ValueError(f"timestamp must be positive epoch milliseconds, at most {MAX_CLOCK_SKEW_MS} ms ahead of now")
+    return ids * len(ROADS) + approach, counts.astype(np.uint16), ts
+
+
+def _integers(values, name):
+    """One flat int64 column; ValueError for scalars, floats, non-numbers and values past int64."""
+    if values is None:
+        raise ValueError(f"every event needs integer {', '.join(FIELDS)} (approach may be a road name)")
+    try:
+        column = np.asarray(values)
+    except (TypeError, ValueError, OverflowError):
+        column = None
+    if column is None or column.ndim != 1:
+        raise ValueError(f"{name} must be a flat list of integers")
+    if column.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if column.dtype.kind not in "iu":  # floats (5.7), bools, strings and mixed lists are refused, not truncated
+        raise ValueError(f"{name} must be integers")
+    if column.dtype.kind == "u" and column.max() > np.iinfo(np.int64).max:
+        raise ValueError(f"{name} out of range")
+    return column.astype(np.int64)
+
+
+def drop_stale(cells, counts, ts, now_ms=None, stale_ms=DETECTOR_STALE_MS):
+    """(cells, counts, ts) without the events already stale_ms old, and how many those were.
+
+    DetectorState would never show them: they would be accepted and vanish.
+    """
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    fresh = ts >= now_ms - stale_ms
+    if fresh.all():
+        return (cells, counts, ts), 0
+    return (cells[fresh], counts[fresh], ts[fresh]), int(fresh.size - fresh.sum())
+
+
+def latest_per_cell(cells, counts, ts):
+    """Keep only the newest event for each cell (the later one on equal timestamps)."""
+    order = np.argsort(ts, kind="stable")
+    cells, counts, ts = cells[order], counts[order], ts[order]
+    _, first = np.unique(cells[::-1], return_index=True)  # first from the end = newest
+    keep = cells.size - 1 - first
+    return cells[keep], counts[keep], ts[keep]
+
+
+class DetectorState:
+    """Newest detector count per (intersection, approach) cell, laid over the generated counts.
+
+    Cells no detector has reported keep the simulated (or replayed) value;
+    reported cells show their last reading until it is `stale_ms` old, then
+    fall back, so a detector that goes quiet stops masking the source (and a
+    replay is back to its deterministic counts once every reading has
+    expired). Events older than what a cell already holds are ignored, so
+    late batches cannot roll it back. With a spool folder, batches that
+    request workers wrote there (see spool_batch) are picked up on each overlay.
+
+    Events do not reach history or storage at their own timestamps: only the
+    newest per cell is kept, and the overlay is recorded with the tick that
+    samples it, like every other count. Per-event history would need the
+    ring and segments to take out-of-order writes, which they do not.
+    """
+
+    def __init__(self, n_intersections, n_approaches, spool=None, stale_ms=DETECTOR_STALE_MS):
+        self.values = np.zeros((n_intersections, n_approaches), dtype=np.uint16)
+        self.ts = np.full((n_intersections, n_approaches), -1, dtype=np.int64)
+        self.spool = spool
+        self.stale_ms = stale_ms
+        self.lock = threading.Lock()
+
+    def merge(self, cells, counts, ts):
+        cells, counts, ts = latest_per_cell(cells, counts, ts)
+        with self.lock:
+            newer = ts >= self.ts.flat[cells]
+            cells = cells[newer]
+            self.values.flat[cells] = counts[newer]
+            self.ts.flat[cells] = ts[newer]
+
+    def overlay(self, counts, now_ms):
+        """counts with every cell reported within stale_ms of `now_ms` replaced by its detector value (a new array)."""
+        if self.spool:
+            self._collect()
+        with self.lock:
+            return np.where(self.ts >= now_ms - self.stale_ms, self.values, counts)
+
+    def _collect(self):
+        for path in sorted(glob.glob(os.path.join(self.spool, SPOOL_PATTERN))):
+            try:
+                events = np.load(path)
+            except (OSError, ValueError):
+                continue  # not fully there yet; next tick
+            self.merge(events["cell"], events["count"], events["ts"])
+            os.remove(path)
+
+
+_spool_seq = itertools.count()
+
+
+def spool_batch(folder, cells, counts, ts):
+    """Hand a flushed batch to the ticker process as one .npy file in the shared folder."""
+    events = np.empty(cells.size, dtype=EVENT_DTYPE)
+    events["cell"], events["count"], events["ts"] = cells, counts, ts
+    path = os.path.join(folder, f"ingest-{os.getpid()}-{time.time_ns()}-{next(_spool_seq)}.npy")
+    with open(path + ".tmp", "wb") as f:  # renamed into place, so the ticker never loads half a file
+        np.save(f, events)
+    os.replace(path + ".tmp", path)
+
+
+class IngestQueue:
+    """Bounded write-behind buffer between the ingestion endpoint and the city state.
+
+    put() appends a whole validated batch (three arrays) under one short lock,
+    so the cost per event is NumPy's, not Python's. A flusher thread swaps the
+    buffer out every FLUSH_INTERVAL, collapses it to the newest event per cell
+    and hands that to `apply` in one call. When a batch would take the buffer
+    past `capacity`, put() refuses it and the caller answers 429.
+    """
+
+    def __init__(self, apply, capacity=MAX_PENDING, interval=FLUSH_INTERVAL):
+        self.apply = apply
+        self.capacity = capacity
+        self.interval = interval
+        self.batches = []
+        self.pending = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.dropped = 0   # accepted, then lost because applying their flush failed
+        self.ignored = 0   # too old to show on arrival (see drop_stale), never queued
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # one drain at a time, so batches are applied in order
+        self.wake = threading.Event()
+        self.thread = None
+
+    def put(self, cells, counts, ts, ignored=0):
+        """Queue a batch; False (nothing queued) when the buffer is full. `ignored`: events the caller left out."""
+        with self.lock:
+            if self.pending + cells.size > self.capacity:
+                self.rejected += cells.size + ignored
+                return False
+            self.ignored += ignored
+            self.batches.append((cells, counts, ts))
+            self.pending += cells.size
+            self.accepted += cells.size
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="ingest-flusher", daemon=True)
+                self.thread.start()
+            if self.pending * 2 >= self.capacity:
+                self.wake.set()
+        return True
+
+    def retry_after(self):
+        """Whole seconds a refused client should wait: about one flush."""
+        return max(1, math.ceil(self.interval))
+
+    def flush(self):
+        """Apply everything buffered so far (the flusher's job; also safe to call at exit)."""
+        with self.flush_lock:
+            with self.lock:
+                batches, self.batches = self.batches, []
+            applied = False
+            try:
+                if batches:
+                    cells, counts, ts = (np.concatenate(parts) for parts in zip(*batches))
+                    self.apply(*latest_per_cell(cells, counts, ts))
+                applied = True
+            finally:
+                with self.lock:
+                    # Counted down only after apply: the buffer's memory is held until then
+                    drained = sum(b[0].size for b in batches)
+                    self.pending -= drained
+                    if applied:
+                        self.flushed += drained
+                    else:
+                        self.dropped += drained
+
+    def _run(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("ingest flush failed; its events are dropped (see IngestQueue.dropped)")
@@ -0,0 +1,150 @@
+import base64
+import functools
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+BUILD_DIR = os.path.join(ASSET_DIR, "build")
+ANIMATIONS = ("Traffic concept.json",)  # the assets the dashboards use; the only ones api.py serves
+
+
+def asset_path(name):
+    """Resolve an asset shipped next to this module (no machine-specific paths)."""
+    return os.path.join(ASSET_DIR, os.path.basename(name))
+
+
+def built_paths(name):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    base = os.path.join(BUILD_DIR, stem + ".min.json")
+    return base, base + ".gz"
+
+
+# --- OPTIMIZER ---
+def _visible(layer, ip, op):
+    # Hidden layers and layers that never appear inside the composition's frame range
+    if layer.get("hd"):
+        return False
+    return ip is None or (layer.get("op", op) > ip and layer.get("ip", ip) < op)
+
+
+def _strip_layers(layers, ip=None, op=None):
+    keep = {id(layer) for layer in layers if _visible(layer, ip, op)}
+    # A kept layer's parents stay too, hidden or not: they carry its transform chain
+    by_ind = {layer["ind"]: layer for layer in layers if "ind" in layer}
+    for layer in [layer for layer in layers if id(layer) in keep]:
+        parent = by_ind.get(layer.get("parent"))
+        while parent is not None and id(parent) not in keep:
+            keep.add(id(parent))
+            parent = by_ind.get(parent.get("parent"))
+    kept = []
+    for layer in layers:
+        if id(layer) in keep:
+            layer.pop("mn", None)  # match names are only used by expressions/tools
+            kept.append(layer)
+    return kept
+
+
+def _referenced(layers, assets_by_id, seen):
+    for layer in layers:
+        ref = layer.get("refId")
+        if ref and ref not in seen:
+            seen.add(ref)
+            nested = assets_by_id.get(ref, {}).get("layers")
+            if nested:
+                _referenced(nested, assets_by_id, seen)
+    return seen
+
+
+def _round(obj, ndigits):
+    if isinstance(obj, float):
+        return round(obj, ndigits)
+    if isinstance(obj, list):
+        return [_round(v, ndigits) for v in obj]
+    if isinstance(obj, dict):
+        return {k: _round(v, ndigits) for k, v in obj.items()}
+    return obj
+
+
+def _reencode_image(asset):
+    """Swap an inline PNG for the smallest of an optimized PNG and a lossless WebP."""
+    prefix = "data:image/png;base64,"
+    if not asset.get("p", "").startswith(prefix):
+        return
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+    raw = base64.b64decode(asset["p"][len(prefix):])
+    image = Image.open(io.BytesIO(raw))
+    candidates = [("png", raw)]
+    for fmt, kwargs in (("png", {"optimize": True}), ("webp", {"lossless": True, "method": 6})):
+        out = io.BytesIO()
+        try:
+            image.save(out, fmt.upper(), **kwargs)
+        except (OSError, KeyError, ValueError):
+            continue  # codec not available in this Pillow build
+        candidates.append((fmt, out.getvalue()))
+    fmt, best = min(candidates, key=lambda c: len(c[1]))
+    asset["p"] = f"data:image/{fmt};base64," + base64.b64encode(best).decode("ascii")
+
+
+def optimize(data, ndigits=3):
+    """Return a leaner copy of a Lottie document: hidden and unused parts dropped, numbers rounded to `ndigits`."""
+    data = json.loads(json.dumps(data))
+    ip, op = data.get("ip", 0), data.get("op", float("inf"))
+    data["layers"] = _strip_layers(data.get("layers", []), ip, op)
+    assets_by_id = {a["id"]: a for a in data.get("assets", [])}
+    for asset in assets_by_id.values():
+        if "layers" in asset:
+            # Precomp layer times are shifted by the parent layer's st, so only hidden ones go
+            asset["layers"] = _strip_layers(asset["layers"])
+    used = _referenced(data["layers"], assets_by_id, set())
+    data["assets"] = [a for a in data.get("assets", []) if a["id"] in used]
+    data.pop("markers", None)
+    for asset in data["assets"]:
+        _reencode_image(asset)
+    return _round(data, ndigits)
+
+
+def build(name):
+    """Write the optimized JSON and a gzip-9 copy of it under build/; returns their paths."""
+    with open(asset_path(name), "r", encoding="utf-8") as f:
+        data = optimize(json.load(f))
+    body = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    plain, packed = built_paths(name)
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    # Write then rename, so readers (and ensure_built after a crash) never see half a file;
+    # the .gz goes last because its mtime is what marks the build current
+    for path, data in ((plain, body), (packed, gzip.compress(body, compresslevel=9))):
+        with tempfile.NamedTemporaryFile(dir=BUILD_DIR, suffix=".tmp", delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+    return plain, packed
+
+
+def ensure_built(name):
+    plain, packed = built_paths(name)
+    source = asset_path(name)
+    if not os.path.exists(packed) or os.path.getmtime(packed) < os.path.getmtime(source):
+        build(name)
+    return plain, packed
+
+
+@functools.lru_cache(maxsize=None)
+def load_animation(name):
+    """Parsed, optimized animation; built on first use and parsed once per process."""
+    _, packed = ensure_built(name)
+    with gzip.open(packed, "rb") as f:
+        return json.loads(f.read())
+
+
+if __name__ == "__main__":
+    # python lottie_assets.py ["Traffic concept.json" ...]
+    for name in sys.argv[1:] or ANIMATIONS:
+        plain, packed = build(name)
+        sizes = [os.path.getsize(p) for p in (asset_path(name), plain, packed)]
+        print(f"{name}: {sizes[0]} -> {sizes[1]} bytes ({sizes[2]} gzipped)")
@@ -0,0 +1,116 @@
+import bisect
+import copy
+import glob
+import json
+import os
+import threading
+import time
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # s
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # bytes
+PUBLISH_EVERY = 1.0  # s between a worker's snapshot files
+
+
+def _histogram(buckets):
+    return {"buckets": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0}
+
+
+def _observe(hist, bounds, value):
+    hist["buckets"][bisect.bisect_left(bounds, value)] += 1
+    hist["sum"] += value
+    hist["count"] += 1
+
+
+class Metrics:
+    """Request counters and latency/size histograms, rendered as Prometheus text.
+
+    State is plain dicts so it can be merged: under serve.py every worker
+    publishes its own state to a file in the shared folder and /metrics sums
+    them, so a scrape sees the whole server whichever worker answers it.
+    """
+
+    def __init__(self, folder=None):
+        self.folder = folder
+        self.requests = {}  # (endpoint, method, status) -> count
+        self.latency = {}   # endpoint -> histogram of seconds
+        self.size = {}      # endpoint -> histogram of response bytes
+        self.published = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, endpoint, method, status, seconds, nbytes=None):
+        with self.lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if endpoint not in self.latency:
+                self.latency[endpoint] = _histogram(LATENCY_BUCKETS)
+                self.size[endpoint] = _histogram(SIZE_BUCKETS)
+            _observe(self.latency[endpoint], LATENCY_BUCKETS, seconds)
+            if nbytes is not None:  # streamed responses have no length
+                _observe(self.size[endpoint], SIZE_BUCKETS, nbytes)
+            due = self.folder is not None and time.monotonic() - self.published >= PUBLISH_EVERY
+            if due:
+                self.published = time.monotonic()
+        if due:
+            self.publish()
+
+    def state(self):
+        with self.lock:
+            return {
+                "requests": [[*k, v] for k, v in self.requests.items()],
+                "latency": copy.deepcopy(self.latency),
+                "size": copy.deepcopy(self.size),
+            }
+
+    def publish(self):
+        path = os.path.join(self.folder, f"metrics-{os.getpid()}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.state(), f)
+        os.replace(path + ".tmp", path)
+
+    def collect(self):
+        """This process's state merged with every other worker's last published one."""
+        states = [self.state()]
+        if self.folder:
+            mine = os.path.join(self.folder, f"metrics-{os.getpid()}.json")
+            for path in glob.glob(os.path.join(self.folder, "metrics-*.json")):
+                if path != mine:
+                    try:
+                        with open(path, "r", encoding="utf-8") as f:
+                            states.append(json.load(f))
+                    except (OSError, ValueError):
+                        pass  # being replaced right now
+        merged = {"requests": {}, "latency": {}, "size": {}}
+        for state in states:
+            for endpoint, method, status, count in state["requests"]:
+                key = (endpoint, method, status)
+                merged["requests"][key] = merged["requests"].get(key, 0) + count
+            for kind in ("latency", "size"):
+                for endpoint, hist in state[kind].items():
+                    into = merged[kind].setdefault(endpoint, {"buckets": [0] * len(hist["buckets"]), "sum": 0.0, "count": 0})
+                    into["buckets"] = [a + b for a, b in zip(into["buckets"], hist["buckets"])]
+                    into["sum"] += hist["sum"]
+                    into["count"] += hist["count"]
+        return merged
+
+    def render(self, gauges=None):
+        """Prometheus text exposition format (version 0.0.4)."""
+        merged = self.collect()
+        lines = ["# HELP traffic_http_requests_total Requests handled, by endpoint, method and status.",
+                 "# TYPE traffic_http_requests_total counter"]
+        for (endpoint, method, status), count in sorted(merged["requests"].items()):
+            lines.append(f'traffic_http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+        for kind, name, bounds, help_text in (
+            ("latency", "traffic_http_request_duration_seconds", LATENCY_BUCKETS, "Time to the first byte of the response."),
+            ("size", "traffic_http_response_size_bytes", SIZE_BUCKETS, "Response body size on the wire (after compression)."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for endpoint, hist in sorted(merged[kind].items()):
+                cumulative = 0
+                for bound, count in zip([*map(str, bounds), "+Inf"], hist["buckets"]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {hist["sum"]:.6f}')
+                lines.append(f'{name}_count{{endpoint="{endpoint}"}} {hist["count"]}')
+        for name, (help_text, value) in (gauges or {}).items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
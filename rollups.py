@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+
+from segment_store import DATA_DIR, SegmentStore
+
+# Bucket widths, finest first; each closed bucket is merged into the next one up
+RESOLUTIONS = {"1m": 60_000, "1h": 3_600_000, "1d": 86_400_000}
+FIELDS = ["count", "sum", "min", "max", "p95"]
+DENSITY_BINS = 256  # junction densities >= 255 share the last histogram bin
+ROLLUP_SEGMENT_ROWS = {"1m": 10, "1h": 1, "1d": 1}
+
+
+def rollup_store(resolution, root=DATA_DIR):
+    return SegmentStore(os.path.join(root, "rollups", resolution), ROLLUP_SEGMENT_ROWS[resolution], np.float32)
+
+
+class _Bucket:
+    """Open bucket for every intersection: count/sum/min/max plus a density histogram for p95.
+
+    Histograms merge exactly, so hour and day percentiles are true percentiles
+    of the raw samples rather than percentiles of minute percentiles.
+    """
+
+    def __init__(self, n):
+        self.count = np.zeros(n, dtype=np.uint32)
+        self.sum = np.zeros(n, dtype=np.float64)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.hist = np.zeros((n, DENSITY_BINS), dtype=np.uint32)
+        self.rows = np.arange(n)
+
+    def add(self, density):
+        self.count += 1
+        self.sum += density
+        np.minimum(self.min, density, out=self.min)
+        np.maximum(self.max, density, out=self.max)
+        self.hist[self.rows, np.minimum(density, DENSITY_BINS - 1).astype(np.intp)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum += other.sum
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+        self.hist += other.hist
+
+    def close(self):
+        """(intersections, len(FIELDS)) float32 row for the bucket."""
+        cum = self.hist.cumsum(axis=1)
+        p95 = (cum < np.ceil(0.95 * self.count)[:, None]).sum(axis=1)
+        empty = self.count == 0
+        out = np.stack([self.count, self.sum, self.min, self.max, p95], axis=1).astype(np.float32)
+        out[empty, 2:] = np.nan
+        return out
+
+    def reset(self):
+        self.count[:] = 0
+        self.sum[:] = 0
+        self.min[:] = np.inf
+        self.max[:] = -np.inf
+        self.hist[:] = 0
+
+
+class Rollups:
+    """Incremental minute/hour/day rollups of junction density, maintained as ticks arrive.
+
+    Each tick touches only the minute bucket; a closing minute is merged into
+    the hour and a closing hour into the day, so per-tick cost does not grow
+    with the resolution count. Closed buckets are appended to one
+    SegmentStore per resolution, keyed by the bucket start time.
+    """
+
+    def __init__(self, n, root=DATA_DIR):
+        self.buckets = {res: _Bucket(n) for res in RESOLUTIONS}
+        self.keys = {res: None for res in RESOLUTIONS}
+        self.stores = {res: rollup_store(res, root) for res in RESOLUTIONS}
+
+    def add(self, ts_ms, counts):
+        for res, width in RESOLUTIONS.items():
+            key = ts_ms // width
+            if self.keys[res] is not None and key != self.keys[res]:
+                self._close(res)
+            self.keys[res] = key
+        self.buckets["1m"].add(counts.sum(axis=1, dtype=np.float64))
+
+    def _close(self, res):
+        bucket = self.buckets[res]
+        self.stores[res].append(self.keys[res] * RESOLUTIONS[res], bucket.close())
+        names = list(RESOLUTIONS)
+        i = names.index(res)
+        if i + 1 < len(names):
+            self.buckets[names[i + 1]].merge(bucket)
+        bucket.reset()
+
+    def flush(self, wait=False):
+        for store in self.stores.values():
+            store.flush(wait)
+
+
+def pick_resolution(window_s, max_points=2000, raw_window_s=2 * 3600):
+    """None (raw samples) for short windows, else the finest rollup with at most max_points buckets."""
+    if window_s <= raw_window_s:
+        return None
+    for res, width in RESOLUTIONS.items():
+        if window_s * 1000 / width <= max_points:
+            return res
+    return list(RESOLUTIONS)[-1]
+
+
+# --- DOWNSAMPLING ---
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: n_out points that keep the visual shape of (x, y)."""
+    n = y.size
+    if n <= n_out or n_out < 3:
+        return x, y
+    xf = x.astype(np.float64)
+    yf = y.astype(np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < n_out - 1 else n
+        # Average of the next bucket is the third triangle vertex
+        cx = xf[hi:nxt_hi].mean()
+        cy = yf[hi:nxt_hi].mean()
+        area = np.abs((xf[a] - cx) * (yf[lo:hi] - yf[a]) - (xf[a] - xf[lo:hi]) * (cy - yf[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return x[idx], y[idx]
@@ -0,0 +1,213 @@
+import glob
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+DATA_DIR = os.environ.get(
+    "TRAFFIC_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "traffic_data")
+)
+SEGMENT_TICKS = 300  # ticks buffered in memory before a segment is written
+READ_RETRIES = 3     # fresh listings a read tries while a compaction removes the segments it listed
+MAX_MAPS = 128       # segment/day files kept memory-mapped by a reader (two maps and descriptors each)
+
+
+def day_of(ts_ms):
+    return datetime.fromtimestamp(ts_ms / 1000, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _save(path, arr):
+    # Write then rename, so a reader never maps a half-written file
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+class SegmentStore:
+    """Append-only on-disk count history, partitioned by UTC day.
+
+    Layout under `root`:
+        YYYY-MM-DD/seg-<start_ms>.ts.npy       int64 epoch ms, (T,)
+        YYYY-MM-DD/seg-<start_ms>.counts.npy   dtype, (intersections, approaches, T)
+        YYYY-MM-DD/day.ts.npy / day.counts.npy the same, compacted once the day is over
+
+    Counts are stored intersection-major so one intersection's series is a
+    contiguous run in each file: reads memory-map the files and slice them
+    without pulling whole files into RAM. Files are never modified after
+    they are written, so the reader caches its maps: the MAX_MAPS most
+    recently read, each dropped as soon as its file is replaced.
+    """
+
+    def __init__(self, root=DATA_DIR, segment_ticks=SEGMENT_TICKS, dtype=np.uint16):
+        self.root = root
+        self.segment_ticks = segment_ticks
+        self.dtype = dtype
+        self.buf_ts = None
+        self.buf_counts = None
+        self.buf_len = 0
+        self.buf_day = None
+        self.lock = threading.Lock()
+        self.io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="segment-writer")
+        self.maps = OrderedDict()  # base -> (mtime_ns, ts map, counts map), least recently read first
+        self.maps_lock = threading.Lock()
+
+    # --- WRITER ---
+    def append(self, ts_ms, counts):
+        """Buffer one (intersections x approaches) tick; full buffers are written in the background."""
+        with self.lock:
+            day = day_of(ts_ms)
+            if self.buf_len and day != self.buf_day:
+                finished = self.buf_day
+                self._flush_locked()
+                self.io.submit(self.compact_day, finished)
+            if self.buf_ts is None:
+                self.buf_ts = np.empty(self.segment_ticks, dtype=np.int64)
+                self.buf_counts = np.empty((self.segment_ticks,) + counts.shape, dtype=self.dtype)
+            self.buf_day = day
+            self.buf_ts[self.buf_len] = ts_ms
+            self.buf_counts[self.buf_len] = counts
+            self.buf_len += 1
+            if self.buf_len == self.segment_ticks:
+                self._flush_locked()
+
+    def flush(self, wait=False):
+        """Write out the partial buffer; wait=True writes it on the calling thread (safe at exit)."""
+        with self.lock:
+            self._flush_locked(sync=wait)
+
+    def _flush_locked(self, sync=False):
+        if not self.buf_len:
+            return
+        ts, counts, day = self.buf_ts[:self.buf_len], self.buf_counts[:self.buf_len], self.buf_day
+        # Hand the filled buffers to the writer thread and start fresh ones
+        self.buf_ts, self.buf_counts, self.buf_len = None, None, 0
+        if sync:
+            self._write_segment(day, ts, counts)
+        else:
+            self.io.submit(self._write_segment, day, ts, counts)
+
+    def _write_segment(self, day, ts, counts):
+        folder = os.path.join(self.root, day)
+        os.makedirs(folder, exist_ok=True)
+        base = os.path.join(folder, f"seg-{int(ts[0])}")
+        _save(base + ".counts.npy", np.ascontiguousarray(counts.transpose(1, 2, 0)))
+        _save(base + ".ts.npy", ts)  # written last: its presence marks the segment complete
+
+    def compact_day(self, day):
+        """Merge a finished day's segments into one pair of files, streaming through a memmap."""
+        folder = os.path.join(self.root, day)
+        segments = self._segment_bases(folder)
+        if not segments:
+            return
+        if os.path.exists(os.path.join(folder, "day.ts.npy")):
+            # Late segments for an already compacted day: merge them in, don't overwrite
+            segments.insert(0, os.path.join(folder, "day"))
+        ts_parts = [np.load(b + ".ts.npy") for b in segments]
+        first = np.load(segments[0] + ".counts.npy", mmap_mode="r")
+        total = sum(t.size for t in ts_parts)
+        tmp = os.path.join(folder, "day.counts.npy.tmp")
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=first.dtype, shape=first.shape[:2] + (total,))
+        pos = 0
+        for base, t in zip(segments, ts_parts):
+            out[:, :, pos:pos + t.size] = np.load(base + ".counts.npy", mmap_mode="r")
+            pos += t.size
+        out.flush()
+        del out
+        os.replace(tmp, os.path.join(folder, "day.counts.npy"))
+        _save(os.path.join(folder, "day.ts.npy"), np.concatenate(ts_parts))
+        for base in segments[1:] if segments[0].endswith("day") else segments:
+            for suffix in (".ts.npy", ".counts.npy"):
+                try:
+                    os.remove(base + suffix)
+                except OSError:
+                    pass  # still mapped by a reader (Windows); the day file takes precedence anyway
+
+    def compact_finished(self, now_ms):
+        """Compact, in the background, every day before `now_ms`'s that still has loose segments.
+
+        Days only compact themselves when a running writer crosses midnight;
+        this catches the ones a restart (or a stopped process) left behind.
+        """
+        today = day_of(now_ms)
+        for day in self.days():
+            if day < today and self._segment_bases(os.path.join(self.root, day)):
+                self.io.submit(self.compact_day, day)
+
+    # --- READER ---
+    @staticmethod
+    def _segment_bases(folder):
+        paths = glob.glob(os.path.join(folder, "seg-*.ts.npy"))
+        return sorted((p[:-len(".ts.npy")] for p in paths), key=lambda b: int(b.rsplit("-", 1)[1]))
+
+    def _open(self, base):
+        # Checked against mtime: a day file is replaced when late segments are merged into it
+        mtime = os.stat(base + ".ts.npy").st_mtime_ns
+        with self.maps_lock:
+            entry = self.maps.get(base)
+            if entry is None or entry[0] != mtime:
+                entry = (mtime, np.load(base + ".ts.npy", mmap_mode="r"), np.load(base + ".counts.npy", mmap_mode="r"))
+                self.maps[base] = entry
+            self.maps.move_to_end(base)
+            while len(self.maps) > MAX_MAPS:
+                self.maps.popitem(last=False)  # e.g. segments compacted away; closed once no view holds them
+        return entry[1], entry[2]
+
+    def _read_day(self, folder, since_ms, until_ms, intersection):
+        ts_parts, count_parts = [], []
+        bases = self._segment_bases(folder)
+        if os.path.exists(os.path.join(folder, "day.ts.npy")):
+            # Compacted day, plus any segments written after the compaction
+            day_ts, _ = self._open(os.path.join(folder, "day"))
+            newest = int(day_ts[-1]) if day_ts.size else -1
+            bases = [os.path.join(folder, "day")] + [b for b in bases if int(b.rsplit("-", 1)[1]) > newest]
+        for base in bases:
+            ts, counts = self._open(base)
+            i0, i1 = np.searchsorted(ts, [since_ms, until_ms])
+            if i0 < i1 and intersection < counts.shape[0]:
+                ts_parts.append(ts[i0:i1])
+                count_parts.append(counts[intersection, :, i0:i1])  # zero-copy view into the map
+        return ts_parts, count_parts
+
+    def days(self):
+        return sorted(d for d in os.listdir(self.root) if len(d) == 10) if os.path.isdir(self.root) else []
+
+    def read(self, since_ms, until_ms, intersection):
+        """Timestamps and (T, approaches) counts for one intersection with since_ms <= ts < until_ms."""
+        ts_parts, count_parts = [], []
+        day = datetime.fromtimestamp(since_ms / 1000, timezone.utc).date()
+        last = datetime.fromtimestamp(until_ms / 1000, timezone.utc).date()
+        while day <= last:
+            folder = os.path.join(self.root, day.isoformat())
+            for attempt in range(READ_RETRIES):
+                try:
+                    parts = self._read_day(folder, since_ms, until_ms, intersection)
+                    break
+                except FileNotFoundError:
+                    # compact_day removed segments it merged after we listed them: list again
+                    if attempt == READ_RETRIES - 1:
+                        raise
+            ts_parts += parts[0]
+            count_parts += parts[1]
+            day += timedelta(days=1)
+
+        if not ts_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=self.dtype)
+        if len(ts_parts) == 1:
+            return ts_parts[0], count_parts[0].T
+        # Only the requested intersection's pages are touched; one copy to stitch segments together
+        return np.concatenate(ts_parts), np.concatenate(count_parts, axis=1).T
+
+
+if __name__ == "__main__":
+    # python segment_store.py compact [YYYY-MM-DD ...]  (default: every finished day)
+    store = SegmentStore()
+    if sys.argv[1:2] == ["compact"]:
+        today = day_of(datetime.now(timezone.utc).timestamp() * 1000)
+        for d in sys.argv[2:] or [d for d in store.days() if d < today]:
+            store.compact_day(d)
+            print(f"compacted {d}")
@@ -0,0 +1,136 @@
+"""Production serving for api.py: one ticker process plus several request workers.
+
+The ticker owns the city state. It generates each tick, writes it to the
+on-disk history and rollups (with TRAFFIC_PERSIST=1), and publishes it to a
+memory-mapped ring (history_store.SharedRingHistory). Workers map that ring
+read-only, so every worker serves the same tick and the ring's memory is
+shared, not copied per worker. Each worker encodes a given URL once per tick
+(orjson when installed) and gzips it once; later requests in the tick copy
+bytes.
+
+gunicorn with threaded (gthread) workers is used where it is available
+(Linux/macOS). Elsewhere waitress serves from a single multi-threaded
+process. Either way, streams take one thread each.
+
+    python serve.py [--bind 127.0.0.1:5000] [--workers 4] [--threads 16] [--server gunicorn|waitress]
+"""
+import argparse
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def shared_folder():
+    # /dev/shm keeps the ring in RAM on Linux; elsewhere the OS page cache does the same job
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return tempfile.mkdtemp(prefix="traffic-", dir=base)
+
+
+def run_ticker(folder):
+    """Ticker process: the only writer of the shared ring, segments and rollups.
+
+    It runs until its stdin is closed, which also happens if the server dies.
+    """
+    os.environ["TRAFFIC_SHARED"] = folder  # api's module-level city then just follows the ring
+    import api
+    from history_store import SharedRingHistory
+    from ingest import DetectorState
+
+    # Workers keep their own forecasters, fed from the ring, so the ticker skips its own
+    history = SharedRingHistory(folder, writer=True)
+    n, approaches = history.counts.shape[1:]
+    # Workers spool ingested detector batches into the folder; each tick picks them up
+    city = api.CityState(n, api.TICK_SECONDS, history=history, forecast=False, source=api.traffic_source(folder),
+                         detectors=DetectorState(n, approaches, spool=folder))
+    stop = threading.Event()
+    threading.Thread(target=lambda: (sys.stdin.read(), stop.set()), daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())  # e.g. a service manager stopping the group
+    try:
+        city.run(stop)
+    finally:
+        if city.store is not None:
+            city.store.flush(wait=True)
+            city.rollups.flush(wait=True)
+
+
+def serve_gunicorn(bind, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", bind)
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", threads)
+            self.cfg.set("keepalive", 5)
+
+        def load(self):
+            from api import app  # imported in each worker, after the ticker has created the ring
+            return app
+
+    Server().run()
+
+
+def serve_waitress(bind, threads):
+    from waitress import serve
+    from api import app
+    # send_bytes=1: flush every write, otherwise stream events sit in waitress's buffer
+    serve(app, listen=bind, threads=threads, send_bytes=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bind", default="127.0.0.1:5000")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (gunicorn)")
+    parser.add_argument("--threads", type=int, default=16, help="request threads per worker")
+    parser.add_argument("--server", choices=["gunicorn", "waitress"],
+                        default="waitress" if sys.platform == "win32" else "gunicorn")
+    parser.add_argument("--ticker", metavar="FOLDER", help=argparse.SUPPRESS)  # internal: run the ticker
+    args = parser.parse_args()
+    if args.ticker:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C reaches the whole group; stop on stdin EOF instead
+        run_ticker(args.ticker)
+        sys.exit(0)
+
+    # Created before any worker starts, so workers can always attach to it
+    from history_store import SharedRingHistory
+    from traffic_stream import ROADS
+    folder = shared_folder()
+    replay = os.environ.get("TRAFFIC_REPLAY")
+    if os.environ.get("TRAFFIC_FEEDS"):
+        from collector import feed_intersections
+        n = feed_intersections(os.environ["TRAFFIC_FEEDS"])  # the feeds file sets the city size
+    elif replay and replay != "synthetic":
+        from trace_replay import trace_intersections
+        n = trace_intersections(replay)  # a replayed trace sets the city size
+    else:
+        n = int(os.environ.get("TRAFFIC_INTERSECTIONS", "10000"))
+    samples = int(os.environ.get("TRAFFIC_HISTORY_SAMPLES", "600"))
+    SharedRingHistory(folder, n, len(ROADS), samples)
+
+    # A plain subprocess rather than multiprocessing: forked workers must not inherit a child handle
+    ticker = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--ticker", folder],
+                              stdin=subprocess.PIPE, cwd=ROOT)
+    os.environ["TRAFFIC_SHARED"] = folder
+    master = os.getpid()
+    print(f"ticker pid {ticker.pid}, shared ring in {folder}")
+    try:
+        if args.server == "gunicorn":
+            serve_gunicorn(args.bind, args.workers, args.threads)
+        else:
+            serve_waitress(args.bind, args.threads)
+    finally:
+        # gunicorn workers are forked from in here and unwind through this block when they exit
+        if os.getpid() == master:
+            ticker.stdin.close()
+            try:
+                ticker.wait(30)
+            except subprocess.TimeoutExpired:
+                ticker.kill()
+            shutil.rmtree(folder, ignore_errors=True)
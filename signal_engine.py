@@ -0,0 +1,86 @@
+from typing import NamedTuple
+
+import numpy as np
+
+ROADS = ["North", "South", "East", "West"]
+BASE_TIME = 15
+ADJUSTMENT_FACTOR = 30
+
+
+class SignalPlan(NamedTuple):
+    green: np.ndarray    # (intersections, approaches) green seconds, int32
+    active: np.ndarray   # (intersections,) index of the approach that gets green
+    waiting: np.ndarray  # (intersections,) sum of count * green ("waiting units")
+
+
+def green_times(counts, base_time=BASE_TIME, adjustment_factor=ADJUSTMENT_FACTOR,
+                min_green=None, max_green=None, cycle_length=None, lost_time=0):
+    """Green splits for a whole (intersections x approaches) count matrix in one pass.
+
+    Each approach gets base_time plus its share of adjustment_factor, as in the
+    original dashboards. An intersection with no vehicles splits evenly instead
+    of dividing by zero. With cycle_length, greens are rescaled so each
+    intersection's greens add up to cycle_length - lost_time; min/max clamps
+    are then enforced and the slack redistributed over the approaches that
+    can still move that way (where the clamps allow the target at all).
+    A 1-D count vector is treated as a single intersection.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    if counts.ndim == 1:
+        counts = counts[np.newaxis, :]
+    n_approaches = counts.shape[1]
+
+    total = counts.sum(axis=1, keepdims=True)
+    share = np.divide(counts, total, out=np.full_like(counts, 1.0 / n_approaches), where=total > 0)
+    green = base_time + share * adjustment_factor
+
+    lo = -np.inf if min_green is None else min_green
+    hi = np.inf if max_green is None else max_green
+    if cycle_length is None:
+        green = np.clip(green, lo, hi)
+    else:
+        target = float(cycle_length - lost_time)
+        green *= target / green.sum(axis=1, keepdims=True)
+        # Positive slack goes to approaches below max_green (min-clamped ones included), negative
+        # slack comes from those above min_green; each round pins at least one more approach
+        for _ in range(n_approaches):
+            clipped = np.clip(green, lo, hi)
+            slack = target - clipped.sum(axis=1, keepdims=True)
+            if np.all(np.abs(slack) < 1e-9):
+                green = clipped
+                break
+            movable = np.where(slack > 0, clipped < hi, clipped > lo)
+            weight = np.where(movable, np.maximum(clipped, 1e-9), 0.0)
+            weight_sum = weight.sum(axis=1, keepdims=True)
+            green = clipped + np.divide(slack * weight, weight_sum, out=np.zeros_like(weight), where=weight_sum > 0)
+        # Drop float noise from the rescale so 22.9999... does not truncate to 22
+        green = np.clip(np.round(green, 6), lo, hi)
+
+    green = green.astype(np.int32)  # truncate like int() in the dashboards
+    active = green.argmax(axis=1)
+    waiting = (counts * green).sum(axis=1)
+    return SignalPlan(green, active, waiting)
+
+
+def lookahead(counts, forecast, weight=0.5):
+    """Blend current counts with forecast counts, so greens lead demand instead of trailing it."""
+    counts = np.asarray(counts, dtype=np.float64)
+    if forecast is None:
+        return counts
+    return (1 - weight) * counts + weight * np.asarray(forecast, dtype=np.float64)
+
+
+def plan_for(vehicle_counts, forecast=None, weight=0.5, **kwargs):
+    """Single-intersection helper for the dashboards: dict of counts in, dicts out.
+
+    With forecast (a dict of expected counts per road), greens are planned on
+    lookahead() of the two; total_waiting is still weighed with the current
+    counts. Returns (green_times, active_road, total_waiting).
+    """
+    roads = list(vehicle_counts)
+    counts = [vehicle_counts[r] for r in roads]
+    planned = counts if forecast is None else lookahead(counts, [forecast[r] for r in roads], weight)
+    plan = green_times(planned, **kwargs)
+    green = dict(zip(roads, plan.green[0].tolist()))
+    waiting = plan.waiting[0] if forecast is None else (plan.green[0] * np.asarray(counts)).sum()
+    return green, roads[int(plan.active[0])], int(waiting)
@@ -0,0 +1,148 @@
+import datetime
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from queue_sim import LOST_TIME
+
+# Saturation-flow multipliers; wet, foggy or dark roads discharge queues more slowly
+WEATHER_FLOW = {"Sunny": 1.0, "Rainy": 0.87, "Foggy": 0.80, "Night": 0.93}
+FULL_DENSITY_FLOW_RATIO = 0.5  # demand / clear-weather saturation flow on the road at 100% density
+# Cross-street flow ratio by hour of day: quiet nights, morning and evening rush
+CROSS_FLOW_BY_HOUR = np.array([
+    0.06, 0.05, 0.05, 0.05, 0.07, 0.12, 0.20, 0.30, 0.33, 0.26, 0.20, 0.20,
+    0.22, 0.21, 0.20, 0.22, 0.28, 0.33, 0.31, 0.24, 0.18, 0.14, 0.10, 0.08,
+])
+PHASES = 2            # the road and its cross street
+MIN_GREEN = 7         # s, pedestrian minimum
+MIN_CYCLE = 30        # s
+MAX_CYCLE = 120       # s
+MAX_FLOW_RATIO = 0.9  # Webster's cycle diverges as the intersection flow ratio approaches 1
+TIME_STEP_MIN = 15    # time of day is quantized to this many minutes
+CACHE_SIZE = 65536
+MAX_BATCH = 10000
+
+
+def parse_time(value):
+    """Minutes after midnight from "HH:MM", an hour number or a datetime.time; None means now."""
+    if value is None or value == "":
+        now = datetime.datetime.now()
+        return now.hour * 60 + now.minute
+    if isinstance(value, datetime.time):
+        return value.hour * 60 + value.minute
+    if isinstance(value, str) and ":" in value:
+        hours, minutes = value.split(":")[:2]
+        return (int(hours) * 60 + int(minutes)) % 1440
+    hours = float(value)
+    if not math.isfinite(hours):
+        raise ValueError(f"time must be a finite hour, got {value!r}")
+    return int(hours * 60) % 1440
+
+
+def quantize(density, weather, time_of_day=None):
+    """Cache key: (density as a whole percent, canonical weather name, time-of-day slot)."""
+    density = int(round(min(max(float(density), 0.0), 100.0)))
+    name = str(weather).strip().capitalize()
+    if name not in WEATHER_FLOW:
+        raise ValueError(f"weather must be one of {', '.join(WEATHER_FLOW)}")
+    return density, name, parse_time(time_of_day) // TIME_STEP_MIN
+
+
+def webster(density, weather_flow, slot):
+    """Vectorized Webster timing for quantized inputs (arrays of equal length).
+
+    The road's flow ratio grows with density and the cross street's follows the
+    hour of day; both rise as weather lowers the saturation flow. The optimal
+    cycle (1.5L + 5) / (1 - Y) is split between the two phases in proportion to
+    their flow ratios. Returns (road green, cross green, cycle, flow ratio) in s.
+    """
+    density = np.asarray(density, dtype=np.float64)
+    weather_flow = np.asarray(weather_flow, dtype=np.float64)
+    hour = np.asarray(slot) * TIME_STEP_MIN // 60
+    y_road = density / 100 * FULL_DENSITY_FLOW_RATIO / weather_flow
+    y_cross = CROSS_FLOW_BY_HOUR[hour] / weather_flow
+    flow_ratio = np.minimum(y_road + y_cross, MAX_FLOW_RATIO)
+    lost = PHASES * LOST_TIME
+    cycle = np.clip((1.5 * lost + 5) / (1 - flow_ratio), MIN_CYCLE, MAX_CYCLE)
+    effective = cycle - lost
+    road = np.maximum(effective * y_road / (y_road + y_cross), MIN_GREEN)
+    cross = np.maximum(effective - road, MIN_GREEN)
+    return np.round(road), np.round(cross), np.round(road + cross + lost), flow_ratio
+
+
+class SignalOptimizer:
+    """Recommended signal times for (road, density, weather, time of day) queries.
+
+    Results are memoized in an LRU cache keyed on the quantized inputs, so a
+    repeated what-if query is one dict lookup. A batch is quantized, its
+    distinct cache misses are computed in one vectorized pass, and the road
+    name is only echoed back: it does not change the timing.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _lookup(self, key):
+        with self.lock:
+            timing = self.cache.get(key)
+            if timing is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+            return timing
+
+    def _store(self, keys, timings):
+        with self.lock:
+            self.misses += len(keys)
+            for key, timing in zip(keys, timings):
+                self.cache[key] = timing
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def optimize(self, queries):
+        """List of result dicts for a list of {road, density, weather, time} dicts."""
+        if len(queries) > MAX_BATCH:
+            raise ValueError(f"at most {MAX_BATCH} queries per batch")
+        keys = [quantize(q.get("density", 50), q.get("weather", "Sunny"), q.get("time")) for q in queries]
+        timings = {}
+        missing = []
+        for key in keys:
+            if key not in timings:
+                timings[key] = self._lookup(key)
+                if timings[key] is None:
+                    missing.append(key)
+        if missing:
+            density, weather, slot = zip(*missing)
+            road, cross, cycle, ratio = webster(density, [WEATHER_FLOW[w] for w in weather], slot)
+            computed = list(zip(road.astype(int).tolist(), cross.astype(int).tolist(),
+                                cycle.astype(int).tolist(), np.round(ratio, 3).tolist()))
+            self._store(missing, computed)
+            timings.update(zip(missing, computed))
+
+        results = []
+        for q, key in zip(queries, keys):
+            road, cross, cycle, ratio = timings[key]
+            slot_min = key[2] * TIME_STEP_MIN
+            results.append({
+                "road": q.get("road", ""),
+                "density": key[0],
+                "weather": key[1],
+                "time": f"{slot_min // 60:02d}:{slot_min % 60:02d}",
+                "signal_time": road,
+                "cross_time": cross,
+                "cycle_time": cycle,
+                "flow_ratio": ratio,
+            })
+        return results
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.cache), "hits": self.hits, "misses": self.misses}
+
+
+optimizer = SignalOptimizer()
@@ -0,0 +1,100 @@
+"""A misbehaving upstream must not stop the collector from polling the other feeds.
+
+    python -m unittest discover tests
+"""
+import gzip
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from collector import STATUS_DTYPE, Feed, FeedCollector, report
+from signal_engine import ROADS
+
+GOOD = json.dumps({r: {"vehicles": 7} for r in ROADS}).encode()
+_packed = gzip.compress(GOOD)
+CORRUPT_GZIP = _packed[:10] + b"\xff\xff\xff\xff" + _packed[-8:]  # valid header, undecodable deflate stream
+
+
+class Upstream(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/good":
+            body, headers = GOOD, {}
+        elif self.path == "/gzip":
+            body, headers = CORRUPT_GZIP, {"Content-Encoding": "gzip"}
+        else:  # /garbage: not the /traffic format at all
+            body, headers = b"<html>maintenance</html>", {}
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MisbehavingUpstreamTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def feed(self, path, intersection):
+        return Feed(f"http://127.0.0.1:{self.server.server_port}{path}", intersection,
+                    interval=0.1, timeout=1.0, retries=1, jitter=0.0)
+
+    def test_bad_feeds_do_not_stop_good_ones(self):
+        collector = FeedCollector([self.feed("/good", 0), self.feed("/gzip", 1), self.feed("/garbage", 2)], seed=0)
+        collector.start()
+        time.sleep(1.0)
+        table = collector.status()
+
+        self.assertTrue(collector.thread.is_alive())
+        self.assertGreater(table["polls"][0], 3)
+        self.assertEqual(table["failures"][0], 0)
+        self.assertEqual(collector.read()[0].tolist(), [7] * len(ROADS))
+        for i in (1, 2):
+            self.assertGreater(table["polls"][i], 3)  # still polled, every poll failing
+            self.assertEqual(table["ok_ms"][i], -1)
+            self.assertTrue(table["error"][i])
+        self.assertIn("gzip", table["error"][1])
+
+    def test_unforeseen_error_is_recorded_on_its_feed(self):
+        collector = FeedCollector([self.feed("/good", 0), self.feed("/good", 1)], seed=0)
+        fetch = collector._fetch
+
+        async def broken(i, feed):
+            if i == 1:
+                raise RuntimeError("parser bug")
+            return await fetch(i, feed)
+
+        collector._fetch = broken
+        collector.start()
+        time.sleep(0.6)
+        table = collector.status()
+
+        self.assertTrue(collector.thread.is_alive())
+        self.assertGreater(table["polls"][0], 2)
+        self.assertGreater(table["failures"][1], 2)
+        self.assertIn("parser bug", table["error"][1])
+
+
+class ReportTest(unittest.TestCase):
+    def test_feed_polled_after_now_is_fresh(self):
+        table = np.zeros(3, dtype=STATUS_DTYPE)
+        table["stale_after_ms"] = 6000
+        table["ok_ms"] = [10_250, 9_000, -1]  # polled just after `now`, a second before, never
+        health = report(table, 10_000)
+        self.assertEqual(health["age_ms"].tolist(), [0, 1000, -1])
+        self.assertEqual(health["stale"].tolist(), [False, False, True])
+        self.assertEqual(health["stale_feeds"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+"""Cycle-length green splits must add up to the cycle whenever the min/max clamps allow it.
+
+    python -m unittest discover tests
+"""
+import unittest
+
+import numpy as np
+
+from signal_engine import green_times
+
+
+class CycleSlackTest(unittest.TestCase):
+    def test_min_clamped_approach_takes_positive_slack(self):
+        # Raw greens [45, 15]: clamped to [40, 16] = 56, so the 4 s left over go to the 16
+        plan = green_times([[3, 1]], base_time=0, adjustment_factor=60, min_green=16, max_green=40, cycle_length=60)
+        self.assertEqual(plan.green.tolist(), [[40, 20]])
+
+    def test_max_clamped_approach_gives_back_negative_slack(self):
+        # Raw greens [22.5, 67.5, 0, 0]: the zeros rise to min_green, and only the capped 30 s ones can pay for it
+        plan = green_times([[1, 3, 0, 0]], base_time=0, adjustment_factor=100, min_green=10, max_green=30,
+                           cycle_length=90)
+        self.assertEqual(plan.green.tolist(), [[30, 30, 15, 15]])
+
+    def test_greens_respect_clamps_and_fill_the_cycle(self):
+        counts = np.random.default_rng(0).integers(0, 50, size=(1000, 4))
+        plan = green_times(counts, min_green=7, max_green=30, cycle_length=90, lost_time=12)
+        self.assertGreaterEqual(plan.green.min(), 7)
+        self.assertLessEqual(plan.green.max(), 30)
+        # Whole seconds are truncated, so each cycle may lose under one second per approach
+        self.assertTrue(np.all((plan.green.sum(axis=1) > 78 - 4) & (plan.green.sum(axis=1) <= 78)))
+
+    def test_infeasible_clamps_win(self):
+        plan = green_times([[50, 1, 1, 1]], base_time=0, adjustment_factor=100, min_green=20, max_green=40,
+                           cycle_length=70)
+        self.assertEqual(plan.green.tolist(), [[20, 20, 20, 20]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import time
+from contextlib import nullcontext
+
+STAGES = ["fetch", "parse", "compute", "figure", "render"]
+
+_OFF = nullcontext()  # shared no-op span: disabled tracing costs one attribute check per stage
+
+
+class _Span:
+    __slots__ = ("timings", "stage", "start")
+
+    def __init__(self, timings, stage):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class Timings:
+    """Stage timings for one dashboard refresh; every call is a no-op unless enabled.
+
+        timings = Timings(enabled)
+        with timings.span("compute"):
+            ...
+        timings.record("fetch", seconds)  # for a stage timed elsewhere (e.g. the feed thread)
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.seconds = {}
+
+    def span(self, stage):
+        return _Span(self, stage) if self.enabled else _OFF
+
+    def record(self, stage, seconds):
+        if self.enabled:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def reset(self):
+        self.seconds = {}
+
+
+def debug_panel(container, timings):
+    """Write one refresh's stage timings into a Streamlit container (e.g. a sidebar placeholder)."""
+    if not timings.enabled:
+        return
+    total = sum(timings.seconds.values()) or 1e-9
+    lines = ["| Stage | ms | share |", "|---|---:|---:|"]
+    for stage in STAGES + sorted(set(timings.seconds) - set(STAGES)):
+        if stage in timings.seconds:
+            s = timings.seconds[stage]
+            lines.append(f"| {stage} | {s * 1000:.2f} | {s / total:.0%} |")
+    lines.append(f"| **total** | **{total * 1000:.2f}** | |")
+    container.markdown("\n".join(lines))
@@ -0,0 +1,235 @@
+"""Recorded and synthetic count sources for api.py's city state.
+
+TraceReplay streams a recorded trace of (intersections x approaches) counts
+from a memory-mapped .npz or .csv file; SyntheticTraffic draws seeded counts
+that follow daily rush-hour profiles. Both map wall-clock time onto their own
+timeline at a speed-up factor, so a day of traffic can be served in minutes,
+and both are deterministic: the counts for a point on the timeline are
+always the same. Write a synthetic trace to replay later with:
+
+    python trace_replay.py out.npz [--intersections 1000] [--hours 24] [--step 60] [--seed 0]
+
+Trace files:
+  .npz  uncompressed (np.savez, not savez_compressed) with ts.npy, epoch ms,
+        shape (T,), and counts.npy, shape (T, intersections, approaches)
+  .csv  a header row `timestamp_ms,0:North,0:South,...` and one row per tick
+        of timestamp_ms followed by every intersection's counts
+"""
+import argparse
+import datetime
+import math
+import mmap
+import struct
+import time
+import zipfile
+
+import numpy as np
+
+from signal_engine import ROADS
+
+MAX_SPEED = 1000.0
+CSV_SCAN_BYTES = 1 << 24  # newline scan chunk: bounds the temporary mask, whatever the file size
+# Synthetic demand: (peak hour, width in hours, height) of the morning and evening rush
+RUSH_HOURS = ((8.5, 1.0, 1.0), (17.75, 1.25, 1.15))
+NIGHT_LEVEL = 0.15
+MIDDAY_LEVEL = 0.45
+WEEKEND_PEAKS = 0.5        # weekend rush hours are half as high
+PEAK_VEHICLES = 30         # mean count per approach at demand 1 for a typical intersection
+# Tidal flow: North/East carry the inbound morning rush, South/West the evening one
+MORNING_BIAS = np.array([1.3, 0.8, 1.2, 0.8])
+EVENING_BIAS = np.array([0.8, 1.3, 0.8, 1.2])
+
+
+def demand(hour, weekday=0):
+    """Relative demand for a local hour of the day (about 0.2 at night, 1.4-1.5 at the weekday peaks)."""
+    peaks = sum(height * math.exp(-0.5 * ((hour - peak) / width) ** 2) for peak, width, height in RUSH_HOURS)
+    if weekday >= 5:
+        peaks *= WEEKEND_PEAKS
+    return NIGHT_LEVEL + MIDDAY_LEVEL * math.exp(-0.5 * ((hour - 13) / 4) ** 2) + peaks
+
+
+class _Timeline:
+    """Maps wall-clock seconds onto a source's timeline, `speed` times faster, from the first read."""
+
+    def __init__(self, speed):
+        if not 0 < speed <= MAX_SPEED:
+            raise ValueError(f"speed must be in (0, {MAX_SPEED:g}]")
+        self.speed = speed
+        self.started = None
+
+    def elapsed_ms(self, now):
+        if self.started is None:
+            self.started = now
+        return (now - self.started) * 1000 * self.speed
+
+
+class SyntheticTraffic:
+    """Seeded counts with rush-hour, weekend and tidal-flow profiles, generated per tick.
+
+    Intersection sizes and approach weights are drawn once from the seed; the
+    counts of a tick are Poisson draws from a generator seeded with (seed,
+    tick index), so any point of the timeline can be produced on its own, in
+    any order, without storing anything.
+    """
+
+    def __init__(self, n_intersections, n_approaches=len(ROADS), seed=0, speed=1.0, start_ms=None, step_s=1.0):
+        self.n = n_intersections
+        self.seed = seed
+        self.start_ms = start_ms
+        self.step_ms = int(step_s * 1000)
+        self.timeline = _Timeline(speed)
+        rng = np.random.default_rng(seed)
+        self.weight = (rng.lognormal(0.0, 0.35, size=(n_intersections, 1))
+                       * rng.uniform(0.7, 1.3, size=(n_intersections, n_approaches)))
+        tidal = n_approaches == len(MORNING_BIAS)
+        self.morning = MORNING_BIAS if tidal else np.ones(n_approaches)
+        self.evening = EVENING_BIAS if tidal else np.ones(n_approaches)
+
+    def counts_at(self, ts_ms):
+        """(intersections, approaches) uint16 counts for a timestamp on the timeline."""
+        tick = int(ts_ms // self.step_ms)
+        t = datetime.datetime.fromtimestamp(tick * self.step_ms / 1000)
+        hour = t.hour + t.minute / 60 + t.second / 3600
+        bias = (1 + (self.morning - 1) * math.exp(-0.5 * ((hour - 8.5) / 2) ** 2)
+                + (self.evening - 1) * math.exp(-0.5 * ((hour - 17.75) / 2) ** 2))
+        mean = PEAK_VEHICLES * demand(hour, t.weekday()) * self.weight * bias
+        counts = np.random.default_rng([self.seed, tick]).poisson(mean)
+        return np.minimum(counts, np.iinfo(np.uint16).max).astype(np.uint16)
+
+    def read(self, now):
+        """Counts for wall-clock time `now` (epoch seconds)."""
+        if self.start_ms is None:
+            self.start_ms = int(now * 1000)
+        return self.counts_at(self.start_ms + self.timeline.elapsed_ms(now))
+
+
+def _npz_member(path, zf, name):
+    # An uncompressed .npz member is a plain .npy file inside the zip: map it where it lies
+    info = zf.getinfo(name + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"{path}: {name} is compressed; save traces with np.savez, not savez_compressed")
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        name_len, extra_len = struct.unpack("<HH", f.read(30)[26:30])
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=offset, order="F" if fortran else "C")
+
+
+class TraceReplay:
+    """Replays a recorded trace file, memory-mapped: only the rows being served are ever read.
+
+    Each read picks the newest row at or before the current point of the
+    timeline, so a high speed-up skips rows instead of falling behind. With
+    loop=True the trace restarts after its last row; otherwise the last row
+    is held.
+    """
+
+    def __init__(self, path, speed=1.0, loop=True):
+        self.path = path
+        self.loop = loop
+        self.timeline = _Timeline(speed)
+        if path.endswith(".npz"):
+            with zipfile.ZipFile(path) as zf:
+                self.ts = _npz_member(path, zf, "ts")
+                self.counts = _npz_member(path, zf, "counts")
+            self.n = self.counts.shape[1]
+            self.row = lambda i: np.array(self.counts[i], dtype=np.uint16)
+        elif path.endswith(".csv"):
+            self._index_csv(path)
+            self.row = self._csv_row
+        else:
+            raise ValueError(f"{path}: traces must be .npz or .csv files")
+        if not len(self.ts):
+            raise ValueError(f"{path}: trace has no rows")
+        step = int(self.ts[1] - self.ts[0]) if len(self.ts) > 1 else 1000
+        self.span_ms = int(self.ts[-1] - self.ts[0]) + step  # one loop, including the last row's tick
+
+    def _index_csv(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        raw = np.frombuffer(self.mm, dtype=np.uint8)
+        ends = np.concatenate([np.flatnonzero(raw[i:i + CSV_SCAN_BYTES] == 10) + i
+                               for i in range(0, raw.size, CSV_SCAN_BYTES)] or [np.zeros(0, dtype=np.int64)])
+        if not ends.size or ends[-1] != raw.size - 1:
+            ends = np.append(ends, raw.size)  # no newline after the last row
+        del raw
+        columns = self.mm[:ends[0]].rstrip(b"\r").split(b",")
+        self.shape = (len(columns) - 1) // len(ROADS), len(ROADS)
+        self.n = self.shape[0]
+        self.starts = ends[:-1] + 1  # rows after the header
+        self.ends = ends[1:]
+        keep = self.ends > self.starts  # skip blank lines
+        self.starts, self.ends = self.starts[keep], self.ends[keep]
+        self.ts = np.array([int(self.mm[s:self.mm.find(b",", s)]) for s in self.starts.tolist()], dtype=np.int64)
+
+    def _csv_row(self, i):
+        line = self.mm[int(self.starts[i]):int(self.ends[i])]
+        values = np.fromstring(line, dtype=np.int64, sep=",")  # parsed in C, no per-value objects
+        return values[1:].reshape(self.shape).astype(np.uint16)
+
+    def position(self, now):
+        """Index of the row to serve at wall-clock time `now`."""
+        elapsed = self.timeline.elapsed_ms(now)
+        elapsed = elapsed % self.span_ms if self.loop else min(elapsed, self.span_ms)
+        return max(0, int(np.searchsorted(self.ts, self.ts[0] + elapsed, side="right")) - 1)
+
+    def read(self, now):
+        """Counts for wall-clock time `now` (epoch seconds)."""
+        return self.row(self.position(now))
+
+
+def trace_intersections(path):
+    """Intersections in a trace file, read from its header only."""
+    if path.endswith(".csv"):
+        with open(path, "rb") as f:
+            return (len(f.readline().rstrip(b"\r\n").split(b",")) - 1) // len(ROADS)
+    with zipfile.ZipFile(path) as zf:
+        return _npz_member(path, zf, "counts").shape[1]
+
+
+def write_trace(path, source, timestamps):
+    """Record source.counts_at() for each timestamp into a .npz or .csv trace, one tick at a time."""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if path.endswith(".csv"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(",".join(["timestamp_ms"] + [f"{i}:{r}" for i in range(source.n) for r in ROADS]) + "\n")
+            for ts in timestamps.tolist():
+                f.write(f"{ts}," + ",".join(map(str, source.counts_at(ts).ravel().tolist())) + "\n")
+        return
+    # Written member by member (stored, not compressed) so TraceReplay can memory-map it
+    fmt = np.lib.format
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+        with zf.open("ts.npy", "w", force_zip64=True) as f:
+            fmt.write_array(f, timestamps)
+        with zf.open("counts.npy", "w", force_zip64=True) as f:
+            fmt.write_array_header_1_0(f, {"descr": "<u2", "fortran_order": False,
+                                           "shape": (timestamps.size, source.n, len(ROADS))})
+            for ts in timestamps.tolist():
+                f.write(source.counts_at(ts).astype("<u2").tobytes())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic rush-hour trace for TRAFFIC_REPLAY.")
+    parser.add_argument("path", help="output .npz or .csv")
+    parser.add_argument("--intersections", type=int, default=1000)
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--step", type=float, default=60.0, help="seconds between rows")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", help="local start time, YYYY-MM-DDTHH:MM (default: today's midnight)")
+    args = parser.parse_args()
+
+    start = (datetime.datetime.fromisoformat(args.start) if args.start
+             else datetime.datetime.combine(datetime.date.today(), datetime.time()))
+    start_ms = int(start.timestamp() * 1000)
+    step_ms = int(args.step * 1000)
+    began = time.perf_counter()
+    synthetic = SyntheticTraffic(args.intersections, seed=args.seed, step_s=args.step)
+    write_trace(args.path, synthetic, np.arange(start_ms, start_ms + int(args.hours * 3_600_000), step_ms))
+    print(f"wrote {args.path}: {args.intersections} intersections, {args.hours:g} h every {args.step:g} s "
+          f"in {time.perf_counter() - began:.1f}s")
@@ -0,0 +1,133 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import wire
+
+
+class TrafficClient:
+    """Shared HTTP client for the dashboards.
+
+    - one pooled keep-alive session instead of a new connection per rerun
+    - connect/read timeouts on every call
+    - a per-URL TTL cache so reruns inside the TTL never touch the network
+    - conditional GETs: once the TTL is up, the cached ETag is sent and a
+      304 Not Modified keeps the cached data (same object, nothing re-parsed)
+    - binary=True asks the bulk endpoints for wire.MIME columns: arrays come
+      back as NumPy views of the body instead of lists of Python ints
+    - a circuit breaker per host: after `failure_threshold` consecutive
+      failures (network errors and 5xx; a 4xx is the request's fault, not the
+      server's) that host is skipped for `reset_after` seconds and callers get
+      the cached data at once
+
+    get_json() never raises for network problems; it returns (data, error) where
+    data is the freshest value available (possibly stale, possibly None). A
+    4xx returns (None, the API's error message); last_status() tells it apart.
+    """
+
+    def __init__(self, timeout=(1.5, 3.0), ttl=2.0, failure_threshold=3, reset_after=15.0, pool_size=20):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache = {}  # (url, binary) -> (fetched_at, data, etag)
+        self.breakers = {}  # host -> [consecutive failures, opened_at or None]
+        self.lock = threading.Lock()
+        self.local = threading.local()  # per-thread timing of the last request
+
+    def circuit_open(self, host):
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if breaker is None or breaker[1] is None:
+                return False
+            if time.monotonic() - breaker[1] >= self.reset_after:
+                # Half-open: let the next request through as a trial
+                breaker[:] = [self.failure_threshold - 1, None]
+                return False
+            return True
+
+    def _settle(self, host, failed):
+        with self.lock:
+            breaker = self.breakers.setdefault(host, [0, None])
+            if not failed:
+                breaker[0] = 0
+            else:
+                breaker[0] += 1
+                if breaker[0] >= self.failure_threshold:
+                    breaker[1] = time.monotonic()
+
+    def cached(self, url, binary=False):
+        with self.lock:
+            entry = self.cache.get((url, binary))
+        return entry[1] if entry else None
+
+    def last_timing(self):
+        """(fetch_ms, parse_ms) of the last request this thread sent over the network."""
+        return getattr(self.local, "timing", (0.0, 0.0))
+
+    def last_status(self):
+        """HTTP status of the last response this thread got over the network (None before any)."""
+        return getattr(self.local, "status", None)
+
+    def get_json(self, url, ttl=None, binary=False):
+        ttl = self.ttl if ttl is None else ttl
+        with self.lock:
+            entry = self.cache.get((url, binary))
+        if entry and time.monotonic() - entry[0] < ttl:
+            return entry[1], None
+        host = urlsplit(url).netloc
+        if self.circuit_open(host):
+            return self.cached(url, binary), "API circuit open, skipping request"
+
+        self.local.status = None
+        try:
+            start = time.perf_counter()
+            headers = {"Accept": f"{wire.MIME}, application/json;q=0.5"} if binary else {}
+            if entry and entry[2]:
+                headers["If-None-Match"] = entry[2]
+            response = self.session.get(url, timeout=self.timeout, headers=headers)
+            self.local.status = response.status_code
+            if 400 <= response.status_code < 500:
+                self._settle(host, failed=False)  # the server answered; the request was wrong
+                return None, self._rejection(response)
+            response.raise_for_status()
+            fetched = time.perf_counter()
+            if response.status_code == 304:
+                data = entry[1]
+            elif response.headers.get("Content-Type", "").startswith(wire.MIME):
+                data = wire.decode(response.content)
+            else:
+                data = response.json()  # an older server, or an endpoint without the binary format
+            self.local.timing = ((fetched - start) * 1000, (time.perf_counter() - fetched) * 1000)
+        except (requests.RequestException, ValueError) as e:
+            self._settle(host, failed=True)
+            return self.cached(url, binary), str(e)
+
+        self._settle(host, failed=False)
+        with self.lock:
+            self.cache[(url, binary)] = (time.monotonic(), data, response.headers.get("ETag"))
+        return data, None
+
+    @staticmethod
+    def _rejection(response):
+        try:
+            return str(response.json()["error"])
+        except (ValueError, KeyError, TypeError):
+            return f"HTTP {response.status_code} {response.reason}"
+
+
+# One client per process; Streamlit reruns reuse the imported module
+client = TrafficClient()
+
+
+def city_size(api="http://127.0.0.1:5000"):
+    """Intersections the API serves (valid ids are 0 to this - 1), or None while it is unreachable."""
+    data, _ = client.get_json(f"{api}/traffic/bulk?limit=0", ttl=60)
+    return data["total"] if data else None
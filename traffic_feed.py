@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from traffic_client import client
+from traffic_stream import ROADS, iter_events, apply_event
+
+MAX_FEEDS = 16  # feeds (threads and API connections) a dashboard process keeps open at once
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One immutable reading of the intersection, shared by every session."""
+    seq: int
+    vehicle_counts: Optional[Mapping[str, int]]
+    timestamp: str
+    fetched_at: float
+    latency_ms: float
+    error: Optional[str] = None
+    parse_ms: float = 0.0  # decoding the response and folding it into vehicle_counts
+
+
+class TrafficFeed:
+    """Process-wide collector: one background thread talks to the API for all viewers.
+
+    Plain URLs are polled every `interval` seconds; `/traffic/stream` URLs are
+    subscribed to once. Readers only ever see a finished Snapshot, swapped in
+    by reference, so they need no lock. stop() ends the thread (a stream at
+    its next event) and wakes every waiting reader.
+    """
+
+    def __init__(self, url, interval=3.0, timeout=(3.05, 5), intersection_id=0):
+        self.url = url
+        self.interval = interval
+        self.intersection_id = intersection_id  # which intersection of a stream to follow
+        self.polled = None  # last polled payload; the client hands the same object back on 304
+        self.timeout = timeout
+        self.snapshot = Snapshot(0, None, "Offline Mode", 0.0, 0.0, "waiting for first reading")
+        self.changed = threading.Condition()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="traffic-feed", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def latest(self):
+        return self.snapshot
+
+    def running(self):
+        return not self.stopped.is_set()
+
+    def stop(self):
+        self.stopped.set()
+        with self.changed:
+            self.changed.notify_all()
+
+    def wait_next(self, seq, timeout=None):
+        """Block until a snapshot newer than `seq` is published (or timeout)."""
+        with self.changed:
+            self.changed.wait_for(lambda: self.snapshot.seq > seq or self.stopped.is_set(), timeout=timeout)
+            return self.snapshot
+
+    def _publish(self, vehicle_counts, timestamp, latency_ms, error=None, parse_ms=0.0):
+        previous = self.snapshot
+        if vehicle_counts is None:
+            # Keep serving the last good counts, marked stale by the error
+            vehicle_counts, timestamp = previous.vehicle_counts, previous.timestamp
+        else:
+            vehicle_counts = MappingProxyType(dict(vehicle_counts))
+        with self.changed:
+            self.snapshot = Snapshot(previous.seq + 1, vehicle_counts, timestamp, time.time(), latency_ms, error, parse_ms)
+            self.changed.notify_all()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                if "/stream" in self.url:
+                    self._subscribe()
+                else:
+                    self._poll()
+            except Exception as e:
+                self._publish(None, None, 0.0, str(e))
+            self.stopped.wait(self.interval)
+
+    def _poll(self):
+        data, error = client.get_json(self.url, ttl=0)
+        if error:
+            raise ConnectionError(error)
+        if data is self.polled:
+            return  # 304 Not Modified: no new snapshot, so viewers waiting on one do not re-render
+        self.polled = data
+        start = time.perf_counter()
+        vehicle_counts = {r: data[r]["vehicles"] for r in ROADS if r in data}
+        fetch_ms, parse_ms = client.last_timing()
+        parse_ms += (time.perf_counter() - start) * 1000
+        self._publish(vehicle_counts, data.get("timestamp", "Unknown"), fetch_ms, parse_ms=parse_ms)
+
+    def _subscribe(self):
+        vehicle_counts = {}
+        for event, text in iter_events(self.url, timeout=(self.timeout[0], 30), decode=False):
+            if self.stopped.is_set():
+                return
+            start = time.perf_counter()
+            payload = json.loads(text)
+            changed = apply_event(vehicle_counts, event, payload, self.intersection_id)
+            parse_ms = (time.perf_counter() - start) * 1000
+            if changed and len(vehicle_counts) == len(ROADS):
+                # Age of the server tick when it reached us
+                latency_ms = max(0.0, time.time() - payload.get("epoch", time.time())) * 1000
+                self._publish(vehicle_counts, payload["timestamp"], latency_ms, parse_ms=parse_ms)
+
+
+_feeds = OrderedDict()  # (url, interval, intersection_id) -> TrafficFeed, least recently used first
+_feeds_lock = threading.Lock()
+
+
+def shared_feed(url, interval=3.0, intersection_id=0):
+    """Start (once per process) and return the collector for `url`.
+
+    At most MAX_FEEDS are kept: opening one more stops the least recently
+    used, whose viewers see running() turn False and ask again.
+    """
+    key = (url, interval, intersection_id)
+    with _feeds_lock:
+        feed = _feeds.get(key)
+        started = feed is None
+        if started:
+            feed = _feeds[key] = TrafficFeed(url, interval, intersection_id=intersection_id).start()
+        _feeds.move_to_end(key)
+        while len(_feeds) > MAX_FEEDS:
+            _feeds.popitem(last=False)[1].stop()
+    if started:
+        # Give the very first viewer a real reading instead of the offline fallback
+        feed.wait_next(0, timeout=5.0)
+    return feed
@@ -0,0 +1,44 @@
+import json
+import requests
+
+ROADS = ["North", "South", "East", "West"]
+
+
+def iter_events(url, timeout=(3.05, 30), decode=True):
+    """Yield (event, data) pairs from a Server-Sent Events endpoint; data stays a string if not decode."""
+    with requests.get(url, stream=True, timeout=timeout, headers={"Accept": "text/event-stream"}) as response:
+        response.raise_for_status()
+        event, data = "message", []
+        for line in response.iter_lines(decode_unicode=True):
+            if line is None:
+                continue
+            if not line:
+                # Blank line ends an event
+                if data:
+                    text = "\n".join(data)
+                    yield event, json.loads(text) if decode else text
+                event, data = "message", []
+            elif line.startswith(":"):
+                continue  # keepalive comment
+            elif line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].strip())
+
+
+def apply_event(vehicle_counts, event, payload, intersection_id=0):
+    """Fold a snapshot/delta event into vehicle_counts; return the roads that changed."""
+    changed = set()
+    if event == "snapshot":
+        if intersection_id in payload["ids"]:
+            row = payload["counts"][payload["ids"].index(intersection_id)]
+            for road, count in zip(payload["roads"], row):
+                if vehicle_counts.get(road) != count:
+                    vehicle_counts[road] = count
+                    changed.add(road)
+    elif event == "delta":
+        for i, col, count in zip(payload["ids"], payload["road_index"], payload["counts"]):
+            if i == intersection_id:
+                vehicle_counts[ROADS[col]] = count
+                changed.add(ROADS[col])
+    return changed
@@ -0,0 +1,9 @@
+import streamlit as st
+
+st.subheader("🧠 About This Project")
+st.write("""
+- Developed for urban mobility improvement.  
+- Powered by AI, data visualization, and live API integration.  
+- Team Goal: Build scalable city-level infrastructure solutions.  
+""")
+st.image("https://cdn.pixabay.com/photo/2017/06/22/18/33/traffic-2432908_1280.jpg", use_container_width=True)
@@ -0,0 +1,32 @@
+import time
+
+import plotly.express as px
+import streamlit as st
+
+from analytics import WINDOWS, HistoryReader
+
+
+@st.cache_resource
+def history_reader():
+    # One reader per process so the memory maps are reused across reruns
+    return HistoryReader()
+
+
+st.subheader("📊 Live Data Visualization")
+
+# Read stored history: raw samples for short windows, minute/hour/day rollups beyond
+intersection = st.number_input("Intersection ID", min_value=0, value=0, step=1)
+window = st.selectbox("Time Window", list(WINDOWS))
+df, resolution, samples = history_reader().frame(WINDOWS[window], int(intersection), int(time.time() * 1000))
+if df.empty:
+    st.info("No stored history for this intersection yet. Start api.py with TRAFFIC_PERSIST=1 and let it collect data.")
+else:
+    st.caption(f"{samples} {'raw samples' if resolution is None else resolution + ' buckets'} → {len(df)} points charted")
+
+    st.line_chart(df.set_index("Time"))
+
+    # Plotly chart
+    fig = px.scatter(df, x="Traffic Density", y="Average Speed (km/h)",
+                     color="Traffic Density", size="Average Speed (km/h)",
+                     title="Speed vs Density Relationship")
+    st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,111 @@
+import numpy as np
+import streamlit as st
+
+from signal_engine import green_times
+from traffic_client import client
+
+BULK_URL = "http://127.0.0.1:5000/traffic/bulk"
+PAGE = 10000  # the API's largest page; bigger cities are fetched page by page
+REFRESH_S = 5
+# Marker per active phase, pointing along the approach that has green:
+# North, South, East, West -> triangle-up, triangle-down, triangle-right, triangle-left
+PHASE_SYMBOLS = np.array([5, 6, 8, 7])
+
+st.subheader("🗺️ City Overview")
+st.caption("Every intersection on one map: colour is vehicles waiting, the arrow is the approach on green "
+           "(▲ North, ▼ South, ▶ East, ◀ West). Click an intersection to open it in the Live Controller.")
+
+
+def city_spec(ids, counts, roads):
+    """One Scattergl trace for the whole city, built from column arrays (no per-intersection widgets).
+
+    Intersections are laid out on a square grid by id. Arrays are passed as
+    NumPy, which Plotly ships as compact typed arrays instead of JSON lists;
+    the active phase is carried by the marker symbol rather than per-point
+    hover text, which would cost more than all the numbers together.
+    """
+    plan = green_times(counts)
+    side = int(np.ceil(np.sqrt(ids.max() + 1)))
+    green = plan.green[np.arange(len(ids)), plan.active]
+    hover = "<br>".join(f"{r}: %{{customdata[{i}]}}" for i, r in enumerate(roads))
+    return {
+        "data": [{
+            "type": "scattergl",
+            "mode": "markers",
+            "x": ids % side,
+            "y": ids // side,
+            "customdata": np.column_stack([counts, green, ids]),  # ints: Plotly packs them as typed arrays
+            "hovertemplate": f"<b>Intersection %{{customdata[{len(roads) + 1}]}}</b><br>{hover}<br>"
+                             f"Active green: %{{customdata[{len(roads)}]}} s<extra></extra>",
+            "marker": {
+                "color": counts.sum(axis=1),
+                "colorscale": "RdYlGn",
+                "reversescale": True,
+                "symbol": PHASE_SYMBOLS[plan.active % len(PHASE_SYMBOLS)],
+                "size": max(3, min(12, 600 // side)),
+                "colorbar": {"title": {"text": "Vehicles"}},
+            },
+        }],
+        "layout": {
+            "height": 700,
+            "xaxis": {"visible": False},
+            "yaxis": {"visible": False, "scaleanchor": "x", "autorange": "reversed"},
+            "margin": {"t": 10, "b": 10, "l": 10, "r": 10},
+            "paper_bgcolor": "#111111",
+            "plot_bgcolor": "#111111",
+            "font": {"color": "#f2f5fa"},
+            "clickmode": "event+select",
+            "uirevision": "city",  # keep zoom and pan across refreshes
+            "template": "none",
+        },
+    }
+
+
+def fetch_city():
+    """(first page, ids, counts, error) for every intersection, fetched PAGE at a time; page None when offline."""
+    pages, offset, error = [], 0, None
+    while True:
+        # Columnar binary: each 10k-row page arrives as NumPy arrays, not 50k Python ints
+        data, page_error = client.get_json(f"{BULK_URL}?offset={offset}&limit={PAGE}", ttl=REFRESH_S, binary=True)
+        error = error or page_error
+        if data is None:
+            break
+        pages.append(data)
+        offset += len(data["ids"])
+        if offset >= data["total"] or not len(data["ids"]):
+            break
+    if not pages:
+        return None, None, None, error
+    # The JSON fallback (older API) still works
+    ids = np.concatenate([np.asarray(p["ids"], dtype=np.int64) for p in pages])
+    counts = np.concatenate([np.asarray(p["counts"], dtype=np.int64).reshape(-1, len(p["roads"])) for p in pages])
+    return pages[0], ids, counts, error
+
+
+# Only the map reruns on the timer; the selection event reruns it too
+@st.fragment(run_every=REFRESH_S)
+def city_map():
+    data, ids, counts, error = fetch_city()
+    if data is None:
+        st.warning(f"⚠️ API offline or unreachable: {error}")
+        return
+    if error:
+        st.warning(f"⚠️ Showing last reading, API unreachable: {error}")
+    if ids.size == 0:
+        st.info("The API reports no intersections.")
+        return
+
+    event = st.plotly_chart(city_spec(ids, counts, data["roads"]), use_container_width=True, theme=None,
+                            key="city_map", on_select="rerun", selection_mode="points")
+    points = event.selection.points if event else []
+    if points:
+        # Drill down: the Live Controller reads the intersection from the query string
+        st.switch_page("views/live.py", query_params={"id": int(ids[points[0]["point_index"]])})
+
+    total = counts.sum(axis=1)
+    busiest = ids[np.argsort(total)[::-1][:5]]
+    st.caption(f"{ids.size:,} of {data['total']:,} intersections | API timestamp: {data['timestamp']} | "
+               f"Busiest: {', '.join(f'#{i}' for i in busiest.tolist())}")
+
+
+city_map()
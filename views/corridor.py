@@ -0,0 +1,113 @@
+import numpy as np
+import streamlit as st
+
+from traffic_client import city_size, client
+
+CORRIDOR_URL = "http://127.0.0.1:5000/corridor"
+REFRESH_S = 10
+CYCLES_SHOWN = 3
+
+st.subheader("🌊 Green Wave")
+st.caption("Signals along one east-west corridor, timed together: a common cycle and offsets chosen so platoons "
+           "leaving one green arrive on the next. Green bars are East-West greens; shaded bands are the "
+           "platoons that clear each link without stopping.")
+
+n_intersections = city_size() or 2  # offline: the panel below says so
+first = st.sidebar.number_input("First intersection", 0, max(0, n_intersections - 2), 0)
+most = min(30, n_intersections - int(first))
+signals = st.sidebar.slider("Signals", 2, most, min(10, most)) if most > 2 else 2
+travel = st.sidebar.slider("Travel time per link (s)", 5, 90, 25)
+
+
+def link_bands(elapsed, cycle, offset, green, src, dst):
+    """x, y of one closed outline per link and cycle: departures on green that also arrive on green."""
+    xs, ys = [], []
+    for i, j in zip(src.tolist(), dst.tolist()):
+        travel = abs(elapsed[j] - elapsed[i])
+        arrive, window = offset[i] + travel, offset[j]
+        for k in range(-2, CYCLES_SHOWN + 2):  # downstream greens around the platoon's arrival
+            a = max(arrive, window + k * cycle)
+            b = min(arrive + green[i], window + k * cycle + green[j])
+            if b <= a:
+                continue
+            for r in range(-2, CYCLES_SHOWN + 1):  # the same band in every cycle on screen
+                shift = r * cycle
+                xs += [a - travel + shift, b - travel + shift, b + shift, a + shift, a - travel + shift, None]
+                ys += [elapsed[i], elapsed[i], elapsed[j], elapsed[j], elapsed[i], None]
+    return xs, ys
+
+
+def time_space_spec(elapsed, cycle, offset, green, links):
+    """Time-space diagram: time across, travel time from the first signal up, one row of greens per signal."""
+    horizon = CYCLES_SHOWN * cycle
+    on_x, on_y, off_x, off_y = [], [], [], []
+    for y, o, g in zip(elapsed.tolist(), offset.tolist(), green.tolist()):
+        for k in range(-1, CYCLES_SHOWN + 1):
+            start = o + k * cycle
+            for xs, ys, a, b in ((on_x, on_y, start, start + g), (off_x, off_y, start + g, start + cycle)):
+                a, b = max(a, 0), min(b, horizon)
+                if b > a:
+                    xs += [a, b, None]
+                    ys += [y, y, None]
+    data = []
+    for (src, dst), name, colour in zip(links, ("Eastbound", "Westbound"), ("rgba(44,160,44,0.25)", "rgba(31,119,180,0.25)")):
+        x, y = link_bands(elapsed, cycle, offset, green, src, dst)
+        data.append({"type": "scatter", "mode": "lines", "x": x, "y": y, "fill": "toself", "fillcolor": colour,
+                     "line": {"width": 0}, "hoverinfo": "skip", "name": f"{name} platoons"})
+    data += [
+        {"type": "scatter", "mode": "lines", "x": off_x, "y": off_y, "line": {"color": "#d62728", "width": 6},
+         "name": "Red (cross street)", "hoverinfo": "skip"},
+        {"type": "scatter", "mode": "lines", "x": on_x, "y": on_y, "line": {"color": "#2ca02c", "width": 6},
+         "name": "East-West green", "hoverinfo": "skip"},
+    ]
+    return {
+        "data": data,
+        "layout": {
+            "height": 520,
+            "xaxis": {"title": {"text": "Time (s)"}, "range": [0, horizon]},
+            "yaxis": {"title": {"text": "Travel time from the first signal (s)"}},
+            "margin": {"t": 10, "b": 40, "l": 60, "r": 10},
+            "legend": {"orientation": "h", "y": -0.15},
+            "template": "none",
+        },
+    }
+
+
+@st.fragment(run_every=REFRESH_S)
+def corridor_panel():
+    ids = ",".join(str(i) for i in range(int(first), int(first) + signals))
+    plan, error = client.get_json(f"{CORRIDOR_URL}?ids={ids}&travel={travel}", ttl=REFRESH_S)
+    if plan is None:
+        if client.last_status() is not None and 400 <= client.last_status() < 500:
+            st.error(f"The API refused this corridor: {error}")
+        else:
+            st.warning(f"⚠️ API offline or unreachable: {error}")
+        return
+    if error:
+        st.warning(f"⚠️ Showing last plan, API unreachable: {error}")
+
+    cycle = int(plan["cycle"][0])  # one corridor: one common cycle
+    offset = np.asarray(plan["offset"])
+    green = np.asarray(plan["green"])[:, 0]
+    position = {i: k for k, i in enumerate(plan["ids"])}
+    src = np.array([position[i] for i in plan["links"]["from"]])
+    dst = np.array([position[i] for i in plan["links"]["to"]])
+    progression = np.asarray(plan["links"]["progression"])
+    forward = np.asarray(plan["links"]["travel"])[dst > src]
+    elapsed = np.concatenate([[0.0], np.cumsum(forward)])
+    east, west = dst > src, dst < src
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Common cycle", f"{cycle} s")
+    c2.metric("Arrivals on green", f"{plan['efficiency']:.0%}")
+    c3.metric("Eastbound band", f"{progression[east].mean():.0f} s / link")
+    c4.metric("Westbound band", f"{progression[west].mean():.0f} s / link" if west.any() else "-")
+    links = [(src[east], dst[east]), (src[west], dst[west])]
+    st.plotly_chart(time_space_spec(elapsed, cycle, offset, green, links), use_container_width=True, theme=None)
+    through = " / ".join(f"{p['band']:.0f} s" for p in plan["paths"])
+    solved = "cached plan" if plan["cached"] else f"solved in {plan['compute_ms']:.0f} ms"
+    st.caption(f"Signals #{first}-#{int(first) + signals - 1} | through-band end to end: {through} | "
+               f"API timestamp: {plan['timestamp']} | {solved}")
+
+
+corridor_panel()
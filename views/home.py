@@ -0,0 +1,18 @@
+import streamlit as st
+from streamlit_lottie import st_lottie
+
+from lottie_assets import load_animation
+
+# Optimized animation, parsed once per process
+lottie_ai = load_animation("Traffic concept.json")
+st_lottie(lottie_ai, height=300, key="ai")
+st.markdown("""
+### 🧩 What It Does
+Our model adjusts **traffic signal timing** dynamically based on real-time traffic density, improving flow and reducing pollution.
+
+### 🌍 Core Features
+- Real-time data input via API  
+- AI-based optimization logic  
+- Data analytics visualization  
+- Predictive insights for future congestion
+""")
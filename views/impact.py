@@ -0,0 +1,111 @@
+import os
+import streamlit as st
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from impact_batch import RESULTS_PATH, load_results
+from queue_sim import BUSY_DEMAND, compare
+from signal_engine import ROADS
+
+st.title("🚦 AI-Powered Smart Traffic Optimization Dashboard")
+
+st.markdown("""
+### 🌍 Objective  
+Reduce congestion, emissions, and waiting time through AI-optimized signal control.
+""")
+
+# --- Simulation Inputs ---
+st.sidebar.header("🚗 Junction Demand (veh/h)")
+demand = tuple(st.sidebar.slider(f"{r} approach", 0, 1200, d, step=20) for r, d in zip(ROADS, BUSY_DEMAND))
+seed = st.sidebar.number_input("Random seed", 0, 1_000_000, 42)
+
+
+@st.cache_data
+def run_comparison(demand, seed):
+    # One simulated hour, fixed-time vs adaptive on the same arrivals
+    return compare(demand, duration=3600, seed=seed)
+
+
+# --- Simulated Metrics (one hour, idling fuel/CO₂) ---
+before, after = run_comparison(demand, int(seed))
+waiting_before = before.avg_delay          # seconds per vehicle
+waiting_after = after.avg_delay
+co2_before = before.co2_g / 1000           # kg per hour
+co2_after = after.co2_g / 1000
+fuel_before = before.fuel_l                # litres per hour
+fuel_after = after.fuel_l
+time_saved = waiting_before - waiting_after
+co2_saved = co2_before - co2_after
+fuel_saved = fuel_before - fuel_after
+st.caption(f"Simulated {before.vehicles} vehicles over one hour | max queue {before.max_queue} → {after.max_queue} vehicles")
+
+# --- Metrics Display ---
+st.markdown("### 📊 Real-Time Impact Metrics")
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    st.metric("⏱ Avg Waiting Time (Before)", f"{waiting_before:.1f}s")
+    st.metric("🌫 CO₂ Emission (Before)", f"{co2_before:.1f}kg")
+    st.metric("⛽ Fuel Wastage (Before)", f"{fuel_before:.2f}L")
+
+with col2:
+    st.metric("✅ Avg Waiting Time (After)", f"{waiting_after:.1f}s", delta=f"-{time_saved:.1f}s saved")
+    st.metric("🌍 CO₂ Emission (After)", f"{co2_after:.1f}kg", delta=f"-{co2_saved:.1f}kg saved")
+    st.metric("⚡ Fuel Used (After)", f"{fuel_after:.2f}L", delta=f"-{fuel_saved:.2f}L saved")
+
+with col3:
+    st.success(f"🕒 **Time Saved:** {time_saved:.1f} sec")
+    st.success(f"🌱 **CO₂ Reduced:** {co2_saved:.1f} kg")
+    st.success(f"💧 **Fuel Saved:** {fuel_saved:.2f} L")
+
+# --- Comparison Charts ---
+st.markdown("### 📈 Visual Comparison")
+# Plotly bars: far cheaper to import than matplotlib, and drawn in the browser
+fig = make_subplots(rows=1, cols=3, subplot_titles=["Avg Waiting Time (sec)", "CO₂ Emission (kg/h)", "Fuel Wastage (L/h)"])
+for i, values in enumerate([[waiting_before, waiting_after], [co2_before, co2_after], [fuel_before, fuel_after]]):
+    fig.add_trace(go.Bar(x=["Before", "After"], y=values, marker_color=["#FF4B4B", "#4CFF4B"], showlegend=False),
+                  row=1, col=i + 1)
+fig.update_layout(height=400)
+
+st.plotly_chart(fig, use_container_width=True)
+
+# --- Monte Carlo Confidence (precomputed by `python impact_batch.py`) ---
+@st.cache_data
+def cached_batch(mtime):
+    return load_results()
+
+
+st.markdown("### 🎯 Confidence Across Replications")
+batch = cached_batch(os.path.getmtime(RESULTS_PATH)) if os.path.exists(RESULTS_PATH) else None
+if batch is None:
+    st.info("No batch results yet. Run `python impact_batch.py --replications 2000` to add 95% confidence intervals.")
+else:
+    m = batch["metrics"]
+    st.caption(f"{batch['replications']} seeded replications on {batch['workers']} cores "
+               f"({batch['elapsed_s']:.1f}s) | demand {batch['demand']} veh/h")
+    if tuple(batch["demand"]) != demand:
+        st.warning("Batch results were computed for a different demand than the sliders above.")
+    ci_cols = st.columns(3)
+    for col, key, label, unit in zip(ci_cols, ["time_saved", "co2_saved", "fuel_saved"],
+                                     ["Time Saved", "CO₂ Reduced", "Fuel Saved"], ["s", "kg", "L"]):
+        col.metric(f"{label} (mean)", f"{m[key]['mean']:.2f}{unit}",
+                   f"95% CI {m[key]['ci_low']:.2f}–{m[key]['ci_high']:.2f}{unit}", delta_color="off")
+
+# --- Summary ---
+st.markdown("""
+### 🧠 AI System Highlights
+- Dynamically adjusts green light timing based on real-time vehicle count.  
+- Reduces idle duration at low-traffic signals.  
+- Demonstrates measurable improvement in both **time and emissions**.  
+- Scalable to entire city intersections through IoT-enabled signals.
+
+---
+
+### 🏁 Results Summary
+| Metric | Before | After | Improvement |
+|:-------|:--------|:-------|:-------------|
+| Avg Waiting Time | {:.1f}s | {:.1f}s | {:.1f}s faster |
+| CO₂ Emission | {:.1f}kg | {:.1f}kg | {:.1f}kg less |
+| Fuel Usage | {:.2f}L | {:.2f}L | {:.2f}L saved |
+
+✅ *AI-Optimized traffic control system reduces both congestion and environmental impact effectively.*
+""".format(waiting_before, waiting_after, time_saved, co2_before, co2_after, co2_saved, fuel_before, fuel_after, fuel_saved))
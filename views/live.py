@@ -0,0 +1,196 @@
+import streamlit as st
+from collections import deque
+from datetime import datetime
+from streamlit_autorefresh import st_autorefresh
+import random
+import time
+from traffic_client import city_size, client
+from traffic_feed import shared_feed
+from signal_engine import plan_for
+from timing import Timings, debug_panel
+from traffic_stream import ROADS
+
+# --- STYLES ---
+st.markdown("""
+    <style>
+    body { background: linear-gradient(135deg, #0f2027, #203a43, #2c5364); color: white; }
+    .stApp { background-color: transparent; }
+    div[data-testid="stMetricValue"] { font-size: 28px; color: #00FF9C; font-weight: bold; }
+    div[data-testid="stMetricLabel"] { font-size: 16px; color: #ddd; }
+    .css-18e3th9 { background-color: transparent !important; }
+    h1, h2, h3, h4, h5, h6 { color: #00E6FF !important; }
+    </style>
+""", unsafe_allow_html=True)
+
+# --- INTERSECTION (?id=, set when drilling down from the City Overview) ---
+try:
+    intersection = max(0, int(st.query_params.get("id", 0)))
+except ValueError:
+    intersection = 0
+n_intersections = city_size()
+if n_intersections is not None and intersection >= n_intersections:
+    st.error(f"Intersection #{intersection} does not exist: the city has intersections #0-#{n_intersections - 1}.")
+    st.stop()
+
+# --- TITLE ---
+st.title("🚦 AI-Powered Smart Traffic Controller (Interactive Dashboard)")
+st.caption(f"Real-Time Intersection Management using Live API Data | Intersection #{intersection}")
+
+# --- SIDEBAR CONTROL PANEL ---
+st.sidebar.header("🧠 Control Panel")
+mode = st.sidebar.radio("Mode:", ["AI Decision", "Manual Override"])
+manual_road = None
+if mode == "Manual Override":
+    manual_road = st.sidebar.selectbox("Select Green Light Lane:", ROADS)
+plan_ahead = st.sidebar.checkbox("Plan ahead (5-min forecast)", help="Blend the forecast into the green times")
+timings = Timings(st.sidebar.checkbox("🐞 Timing panel", help="Time each stage of every refresh"))
+timing_slot = st.sidebar.empty()
+
+# --- LAYOUT (placeholders are patched in place as stream events arrive) ---
+status_slot = st.empty()
+st.markdown("### 🚗 Live Traffic Snapshot")
+metric_slots = [c.empty() for c in st.columns(4)]
+st.markdown("### 📊 Traffic Density Visualization")
+chart_slot = st.empty()
+st.markdown("### 📈 Rolling Lane Counts")
+trend_slot = st.empty()
+st.markdown("### 🛣️ Intersection Simulation")
+light_slots = [c.empty() for c in st.columns(4)]
+wait_slot = st.empty()
+caption_slot = st.empty()
+
+# --- FOOTER ---
+st.markdown("""
+---
+✅ *Powered by AI-driven optimization logic.*  
+💡 *Created for Hackathon 2025 — Urban Development & Infrastructure.*
+""")
+
+# Last value drawn into each placeholder, so unchanged widgets are skipped
+shown = {}
+
+# --- CHART STATE (built once; each update patches values instead of rebuilding a figure) ---
+# A plain spec with the empty "none" template: plotly_dark (or the default template
+# Plotly fills in) is over 90% of a serialized figure, so colours are set by hand
+bar_spec = {
+    "data": [{
+        "type": "bar",
+        "x": list(ROADS),
+        "y": [0] * len(ROADS),
+        "text": [""] * len(ROADS),
+        "textposition": "outside",
+        "marker": {"color": ["#E74C3C"] * len(ROADS)},
+    }],
+    "layout": {
+        "title": {"text": "Traffic Distribution per Lane"},
+        "xaxis": {"title": {"text": "Direction"}, "gridcolor": "#283442"},
+        "yaxis": {"title": {"text": "Vehicle Count"}, "gridcolor": "#283442"},
+        "height": 450,
+        "paper_bgcolor": "#111111",
+        "plot_bgcolor": "#111111",
+        "font": {"color": "#f2f5fa"},
+        "template": "none",
+    },
+}
+TREND_POINTS = 60  # readings kept on the rolling chart
+trend_x = deque(maxlen=TREND_POINTS)
+trend_y = {r: deque(maxlen=TREND_POINTS) for r in ROADS}
+trend_spec = {
+    "data": [{"type": "scatter", "mode": "lines", "name": r, "x": [], "y": []} for r in ROADS],
+    "layout": dict(bar_spec["layout"], title={"text": "Vehicles per Lane"}, height=250,
+                   xaxis={"type": "date", "gridcolor": "#283442"}, yaxis={"gridcolor": "#283442"},
+                   margin={"t": 40, "b": 30}),
+}
+
+
+def redraw(slot_key, value):
+    if shown.get(slot_key) == value:
+        return False
+    shown[slot_key] = value
+    return True
+
+
+def append_trend(vehicle_counts):
+    """Append one reading to the rolling chart; old points fall off the front of the deques."""
+    with timings.span("figure"):
+        trend_x.append(int(time.time() * 1000))
+        for trace in trend_spec["data"]:
+            trend_y[trace["name"]].append(vehicle_counts[trace["name"]])
+            trace["x"], trace["y"] = list(trend_x), list(trend_y[trace["name"]])
+    with timings.span("render"):
+        shown["trend_seq"] = shown.get("trend_seq", 0) + 1
+        trend_slot.plotly_chart(trend_spec, use_container_width=True, theme=None, key=f"trend_{shown['trend_seq']}")
+
+
+def upcoming():
+    """Expected counts 5 minutes out from /traffic/forecast, or None; cached by the client for 30 s."""
+    data, _ = client.get_json(f"http://127.0.0.1:5000/traffic/forecast?ids={intersection}&minutes=5", ttl=30)
+    if not data or data.get("counts") is None:
+        return None
+    return dict(zip(data["roads"], data["counts"][0][0]))
+
+
+def render(vehicle_counts, timestamp, latency_ms=0.0, parse_ms=0.0):
+    # Network and decoding happen on the feed thread; it reports their times with the snapshot
+    timings.reset()
+    timings.record("fetch", latency_ms / 1000)
+    timings.record("parse", parse_ms / 1000)
+
+    # --- AI LOGIC ---
+    base_time = 15
+    adjustment_factor = 30
+    with timings.span("fetch"):
+        forecast = upcoming() if plan_ahead else None
+    with timings.span("compute"):
+        green_times, active_road, total_wait = plan_for(vehicle_counts, forecast, base_time=base_time, adjustment_factor=adjustment_factor)
+        active_road = manual_road or active_road
+
+    with timings.span("render"):
+        for i, r in enumerate(ROADS):
+            if redraw(("metric", r), (vehicle_counts[r], green_times[r], r == active_road)):
+                delta_color = "normal" if r != active_road else "inverse"
+                metric_slots[i].metric(f"{r} Lane", f"{vehicle_counts[r]} cars", f"{green_times[r]}s", delta_color=delta_color)
+            if redraw(("light", r), r == active_road):
+                light_color = "🟢" if r == active_road else "🔴"
+                light_slots[i].markdown(f"<h3 style='text-align:center'>{r}<br>{light_color}</h3>", unsafe_allow_html=True)
+
+    # --- VISUAL BAR CHART ---
+    if redraw("chart", (tuple(vehicle_counts.values()), active_road)):
+        with timings.span("figure"):
+            bar = bar_spec["data"][0]
+            bar["y"] = [vehicle_counts[r] for r in ROADS]
+            bar["marker"]["color"] = ["#2ECC71" if r == active_road else "#E74C3C" for r in ROADS]
+            bar["text"] = [f"{green_times[r]}s green" for r in ROADS]
+        with timings.span("render"):
+            # Each redraw needs its own key: a long-lived run may see the same figure twice
+            shown["chart_seq"] = shown.get("chart_seq", 0) + 1
+            chart_slot.plotly_chart(bar_spec, use_container_width=True, theme=None, key=f"density_{shown['chart_seq']}")
+    append_trend(vehicle_counts)
+
+    # --- TOTAL WAITING TIME ---
+    with timings.span("render"):
+        if redraw("wait", total_wait):
+            wait_slot.metric("⏱️ Estimated Total Waiting Units", total_wait)
+        caption_slot.caption(f"Last updated: {datetime.now().strftime('%H:%M:%S')} | API timestamp: {timestamp} | Feed latency: {latency_ms:.0f} ms")
+    debug_panel(timing_slot, timings)
+
+
+# --- LIVE STREAM ---
+# One shared subscription per process pushes snapshots; each viewer just waits on it
+stream_url = f"http://127.0.0.1:5000/traffic/stream?ids={intersection}"  # Replace with your actual API endpoint
+feed = shared_feed(stream_url, intersection_id=intersection)
+snapshot = feed.latest()
+if snapshot.vehicle_counts is None:
+    status_slot.warning(f"⚠️ API offline or unreachable: {snapshot.error}")
+    render({r: random.randint(5, 40) for r in ROADS}, "Offline Mode")
+    snapshot = feed.wait_next(snapshot.seq, timeout=3.0)
+while snapshot.vehicle_counts is not None and feed.running():
+    if redraw("status", snapshot.error):
+        if snapshot.error:
+            status_slot.warning(f"⚠️ Showing last reading, API unreachable: {snapshot.error}")
+        else:
+            status_slot.empty()
+    render(dict(snapshot.vehicle_counts), snapshot.timestamp, snapshot.latency_ms, snapshot.parse_ms)
+    snapshot = feed.wait_next(snapshot.seq, timeout=30)
+# Still offline, or the feed was closed for a newer one: rerun shortly to pick one up again
+st_autorefresh(interval=3000, key="refresh")
@@ -0,0 +1,45 @@
+import datetime
+from urllib.parse import urlencode
+
+import streamlit as st
+
+from signal_optimizer import WEATHER_FLOW, optimizer
+from traffic_client import client
+
+st.subheader("⚙️ Run Optimization")
+
+road = st.text_input("Enter Road Name / ID")
+traffic_input = st.slider("Traffic Density", 0, 100, 50)
+weather = st.selectbox("Weather Condition", list(WEATHER_FLOW))
+time_of_day = st.time_input("Time of Day", datetime.datetime.now().time().replace(second=0, microsecond=0))
+
+if st.button("Optimize"):
+    # Call your API
+    query = {"road": road, "density": traffic_input, "weather": weather, "time": time_of_day.strftime("%H:%M")}
+    result, _ = client.get_json("http://127.0.0.1:5000/optimize?" + urlencode(query))
+    if result is not None and "signal_time" in result:
+        st.success(f"🚦 Optimized Timing: {result['signal_time']} seconds")
+    else:
+        # Same model, computed here: the answer does not depend on the API being up
+        result = optimizer.optimize([query])[0]
+        st.warning("⚠️ API unavailable, computed locally.")
+        st.info(f"🚦 Suggested Time: {result['signal_time']} seconds")
+    st.caption(f"Cross street: {result['cross_time']} s | Cycle: {result['cycle_time']} s | "
+               f"Flow ratio: {result['flow_ratio']} | Time slot: {result['time']}")
+
+st.subheader("🔮 Congestion Forecast")
+intersection = st.number_input("Intersection ID", min_value=0, value=0, step=1)
+forecast, error = client.get_json(f"http://127.0.0.1:5000/traffic/forecast?ids={int(intersection)}", ttl=30)
+if forecast is None:
+    st.warning(f"⚠️ Forecast unavailable: {error}")
+elif forecast.get("counts") is None:
+    st.info("Forecasts start after the first full minute of data.")
+elif not forecast["ids"]:
+    st.warning("Unknown intersection ID.")
+else:
+    rows = ["| Ahead | " + " | ".join(forecast["roads"]) + " | Total |", "|---" * (len(forecast["roads"]) + 2) + "|"]
+    for minutes, counts in zip(forecast["minutes"], forecast["counts"]):
+        row = counts[0]
+        rows.append(f"| {minutes} min | " + " | ".join(f"{c:.0f}" for c in row) + f" | {sum(row):.0f} |")
+    st.markdown("\n".join(rows))
+    st.caption(f"Expected vehicles per approach (Holt-Winters, updated every minute) | As of {forecast['timestamp']}")
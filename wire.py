@@ -0,0 +1,77 @@
+import json
+import struct
+
+import numpy as np
+
+# Columnar binary encoding for the bulk endpoints, negotiated with the Accept header.
+#
+#   MAGIC | header length (uint32 LE) | JSON header | zero padding | columns
+#
+# The header holds every non-array field under "meta" and one descriptor per
+# NumPy column: {"name", "dtype", "shape", "offset"}, the offset counted from
+# the first column, which starts at the first 8-byte boundary after the
+# header. Columns are little-endian, C-ordered and 8-byte aligned, so
+# np.frombuffer maps each one without a copy. A 1-D integer column that is a
+# plain run (ids 0..n-1, say) is sent as {"name", "dtype", "range": [start,
+# stop]} and costs nothing on the wire.
+MIME = "application/vnd.traffic.columns"
+MAGIC = b"TCOL"
+ALIGN = 8
+
+
+def _padding(size):
+    return -size % ALIGN
+
+
+def _is_run(arr):
+    return (arr.ndim == 1 and arr.size > 1 and arr.dtype.kind in "iu"
+            and int(arr[-1]) - int(arr[0]) == arr.size - 1 and bool(np.all(np.diff(arr) == 1)))
+
+
+def encode(payload):
+    """Bytes for a response dict: arrays become binary columns, everything else goes in the header."""
+    meta, columns, blobs = {}, [], []
+    offset = 0
+    for name, value in payload.items():
+        if not isinstance(value, np.ndarray):
+            meta[name] = value
+            continue
+        dtype = value.dtype.newbyteorder("<")
+        if _is_run(value):
+            columns.append({"name": name, "dtype": dtype.str, "range": [int(value[0]), int(value[-1]) + 1]})
+            continue
+        data = np.ascontiguousarray(value, dtype=dtype).tobytes()
+        columns.append({"name": name, "dtype": dtype.str, "shape": list(value.shape), "offset": offset})
+        blobs += [data, b"\0" * _padding(len(data))]
+        offset += len(data) + _padding(len(data))
+    header = json.dumps({"meta": meta, "columns": columns}, separators=(",", ":")).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    return b"".join([prefix, b"\0" * _padding(len(prefix)), *blobs])
+
+
+def decode(body):
+    """Dict of meta fields plus NumPy arrays viewing `body` (read-only; no per-element objects).
+
+    Raises ValueError on anything that is not a whole, well-formed body.
+    """
+    if body[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a columnar traffic body")
+    try:
+        (size,) = struct.unpack_from("<I", body, len(MAGIC))
+        end = len(MAGIC) + 4 + size
+        if end > len(body):
+            raise ValueError("header runs past the end of the body")
+        header = json.loads(bytes(body[len(MAGIC) + 4:end]))
+        start = end + _padding(end)
+        out = header["meta"]
+        for column in header["columns"]:
+            dtype = np.dtype(column["dtype"])
+            if "range" in column:
+                out[column["name"]] = np.arange(*column["range"], dtype=dtype)
+            else:
+                count = int(np.prod(column["shape"], dtype=np.int64))
+                out[column["name"]] = np.frombuffer(body, dtype=dtype, count=count,
+                                                    offset=start + column["offset"]).reshape(column["shape"])
+    except (struct.error, KeyError, TypeError, ValueError, OverflowError) as e:
+        raise ValueError(f"malformed columnar body: {e}")
+    return out